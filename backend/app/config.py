@@ -21,6 +21,23 @@ CORS_ORIGINS: list[str] = [
 
 DEFAULT_SEED: int = int(os.getenv("DEFAULT_SEED", "42"))
 
+# Idle SSE log streams send a keepalive comment (and re-check the job) this often
+SSE_KEEPALIVE_SECONDS: float = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Pipeline jobs run concurrently in this many worker processes.  Kept small by
+# default: each idle worker holds a full scipy/scikit-learn interpreter, and
+# the CPUs left over go to PIPELINE_THREADS.
+WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+# Threads each pipeline uses for scoring and self-docking.  Ensemble states and
+# self-dock orientations are independent, so each job's worker process scores
+# them on a thread pool sharing one set of precomputed coordinate arrays (the
+# KD-tree and NumPy kernels release the GIL).  By default the CPUs are shared
+# out across the worker processes instead of each taking them all.
+PIPELINE_THREADS: int = int(
+    os.getenv("PIPELINE_THREADS", str(max(1, (os.cpu_count() or 1) // WORKER_PROCESSES)))
+)
+
 # Pipeline defaults
 FAST_ENSEMBLE_SIZE: int = 5
 DEEP_ENSEMBLE_SIZE: int = 20
@@ -2,7 +2,7 @@
 
 Computes five risk terms and combines them into a DevelopabilityScore [0–100]:
 
-1. Hydrophobic patch score — fraction of surface-exposed hydrophobic residues.
+1. Hydrophobic patch score — hydropathy of the most hydrophobic sliding window.
 2. Net charge & pI — using amino-acid pKa values.
 3. Beta-sheet propensity — average β-sheet propensity of the sequence.
 4. Self-dock risk proxy — dock the binder against a copy of itself and score
@@ -13,14 +13,16 @@ The composite score is 100 (best) minus weighted penalties.
 
 from __future__ import annotations
 
-import copy
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from Bio.PDB.Structure import Structure
-from Bio.PDB.Polypeptide import three_to_one
+from scipy.spatial.transform import Rotation
 
+from app import config
 from app.models import DevelopabilityBreakdown
-from app.pipeline.scoring import score_interface
+from app.pipeline.preprocess import extract_sequence
+from app.pipeline.scoring import StateArrays, precompute_state_arrays, score_interface
 
 # ── Constants ────────────────────────────────────────────────────────────────
 
@@ -40,6 +42,9 @@ BETA_PROPENSITY: dict[str, float] = {
     "G": 0.75, "K": 0.74, "D": 0.54, "P": 0.55, "E": 0.37,
 }
 
+# Sliding-window length (residues) for hydrophobic patch detection
+PATCH_WINDOW = 7
+
 # pKa values for pI calculation
 PKA_NTERM = 9.69
 PKA_CTERM = 2.34
@@ -47,112 +52,205 @@ PKA_SIDE: dict[str, float] = {
     "D": 3.65, "E": 4.25, "C": 8.18, "Y": 10.07,
     "H": 6.00, "K": 10.53, "R": 12.48,
 }
+BASIC_AA = ("H", "K", "R")
+
+
+def _ascii_lut(table: dict[str, float], default: float = 0.0) -> np.ndarray:
+    """Build a 128-entry lookup array indexed by ASCII code of the residue letter."""
+    lut = np.full(128, default)
+    for aa, value in table.items():
+        lut[ord(aa)] = value
+    return lut
+
+
+# Per-residue property lookups over encoded sequences (see _encode_seq)
+_KD_LUT = _ascii_lut(HYDROPHOBICITY)
+_BETA_LUT = _ascii_lut(BETA_PROPENSITY, default=1.0)
+
+# Ionisable side chains as parallel arrays: ASCII code, charge sign
+# (+1 basic, -1 acidic) and pKa, indexed in the same order
+_CHARGED_CODES = np.array([ord(aa) for aa in PKA_SIDE], dtype=np.intp)
+_CHARGED_SIGNS = np.array([1.0 if aa in BASIC_AA else -1.0 for aa in PKA_SIDE])
+_CHARGED_PKAS = np.array(list(PKA_SIDE.values()))
+
+# Coarse pH grid used to bracket the isoelectric point, and the number of
+# points used to refine within the bracketing 0.1 pH interval
+PH_GRID = np.linspace(0.0, 14.0, 141)
+PI_REFINE_POINTS = 41
 
 
 # ── Utility functions ────────────────────────────────────────────────────────
 
 def _extract_full_sequence(structure: Structure) -> str:
     """Get concatenated single-letter sequence from all chains."""
-    seq_parts: list[str] = []
-    model = structure[0]
-    for chain in model:
-        for residue in chain:
-            try:
-                seq_parts.append(three_to_one(residue.get_resname()))
-            except KeyError:
-                continue
-    return "".join(seq_parts)
+    return "".join(extract_sequence(structure).values())
 
 
 def _count_residue(seq: str, aa: str) -> int:
     return seq.count(aa)
 
 
+def _encode_seq(seq: str) -> np.ndarray:
+    """Encode a single-letter sequence as a uint8 array of ASCII codes."""
+    return np.frombuffer(seq.encode("ascii"), dtype=np.uint8)
+
+
+def _composition(enc: np.ndarray) -> np.ndarray:
+    """Residue counts of an encoded sequence, indexed by ASCII code."""
+    return np.bincount(enc, minlength=128)
+
+
+def _charged_counts(counts: np.ndarray) -> np.ndarray:
+    """Number of each ionisable residue type, in `PKA_SIDE` order."""
+    return counts[_CHARGED_CODES].astype(np.float64)
+
+
+def _net_charge_vec(charged: np.ndarray, ph: float) -> float:
+    """Henderson-Hasselbalch net charge at a given pH from ionisable-residue counts."""
+    # N-terminus (positive), C-terminus (negative)
+    charge = 1.0 / (1.0 + 10 ** (ph - PKA_NTERM)) - 1.0 / (1.0 + 10 ** (PKA_CTERM - ph))
+
+    # Side chains: +1/(1+10^(pH-pKa)) for bases, -1/(1+10^(pKa-pH)) for acids
+    signs = _CHARGED_SIGNS
+    charge += float(np.dot(charged, signs / (1.0 + 10.0 ** (signs * (ph - _CHARGED_PKAS)))))
+    return charge
+
+
 def _net_charge_at_ph(seq: str, ph: float = 7.4) -> float:
     """Calculate net charge at a given pH."""
-    charge = 0.0
-    # N-terminus (positive)
-    charge += 1.0 / (1.0 + 10 ** (ph - PKA_NTERM))
-    # C-terminus (negative)
-    charge -= 1.0 / (1.0 + 10 ** (PKA_CTERM - ph))
-
-    for aa in seq:
-        if aa in ("D", "E", "C", "Y"):
-            pka = PKA_SIDE[aa]
-            charge -= 1.0 / (1.0 + 10 ** (pka - ph))
-        elif aa in ("H", "K", "R"):
-            pka = PKA_SIDE[aa]
-            charge += 1.0 / (1.0 + 10 ** (ph - pka))
+    return _net_charge_vec(_charged_counts(_composition(_encode_seq(seq))), ph)
 
-    return charge
+
+def _net_charge_grid(charged: np.ndarray, ph_grid: np.ndarray) -> np.ndarray:
+    """Net charge at every pH in `ph_grid` (one broadcast over residue types)."""
+    signs = _CHARGED_SIGNS
+    fractions = signs / (1.0 + 10.0 ** (signs * (ph_grid[:, None] - _CHARGED_PKAS)))
+    termini = 1.0 / (1.0 + 10 ** (ph_grid - PKA_NTERM)) - 1.0 / (1.0 + 10 ** (PKA_CTERM - ph_grid))
+    return termini + fractions @ charged
+
+
+def _pI_vec(charged: np.ndarray) -> float:
+    """Isoelectric point: bracket the charge sign change on a pH grid, then refine.
+
+    Net charge decreases monotonically with pH, so the first grid point with
+    non-positive charge brackets the root together with its predecessor.
+    """
+    charges = _net_charge_grid(charged, PH_GRID)
+
+    idx = int(np.searchsorted(-charges, 0.0))
+    if idx == 0:
+        return float(PH_GRID[0])
+    if idx == len(PH_GRID):
+        return float(PH_GRID[-1])
+
+    # Refine inside the bracket on a fine grid, then interpolate linearly
+    fine = np.linspace(PH_GRID[idx - 1], PH_GRID[idx], PI_REFINE_POINTS)
+    fine_charges = _net_charge_grid(charged, fine)
+    j = int(np.searchsorted(-fine_charges, 0.0))
+    c_lo, c_hi = fine_charges[j - 1], fine_charges[j]
+    pi = fine[j - 1] + (fine[j] - fine[j - 1]) * c_lo / (c_lo - c_hi)
+    return round(float(pi), 2)
 
 
 def _compute_pI(seq: str) -> float:
-    """Binary search for isoelectric point."""
-    lo, hi = 0.0, 14.0
-    for _ in range(100):
-        mid = (lo + hi) / 2.0
-        charge = _net_charge_at_ph(seq, mid)
-        if charge > 0:
-            lo = mid
-        else:
-            hi = mid
-    return round((lo + hi) / 2.0, 2)
+    """Isoelectric point of a single-letter sequence."""
+    return _pI_vec(_charged_counts(_composition(_encode_seq(seq))))
+
+
+def _hydrophobic_patch_vec(kd: np.ndarray) -> float:
+    """Mean Kyte-Doolittle hydropathy of the most hydrophobic window, scaled to [0, 1].
+
+    `kd` holds per-residue hydropathy values.  Window sums come from a
+    prefix-sum difference, so the cost is O(N) for any window length.
+    0 means no window with net hydrophobic character; 1 means a window of
+    pure isoleucine.
+    """
+    if kd.size == 0:
+        return 0.0
+    w = min(PATCH_WINDOW, kd.size)
+    cs = np.concatenate(([0.0], np.cumsum(kd)))
+    window_means = (cs[w:] - cs[:-w]) / w
+    patch = window_means.max() / HYDROPHOBICITY["I"]
+    return round(float(np.clip(patch, 0.0, 1.0)), 3)
 
 
 def _hydrophobic_patch_score(seq: str) -> float:
-    """Fraction of residues that are strongly hydrophobic (KD > 2.0)."""
-    if not seq:
+    return _hydrophobic_patch_vec(_KD_LUT[_encode_seq(seq)])
+
+
+def _beta_propensity_vec(counts: np.ndarray) -> float:
+    """Mean β-sheet propensity (0–2 scale; >1.2 = elevated risk) from residue counts."""
+    n = counts.sum()
+    if n == 0:
         return 0.0
-    hydro_count = sum(1 for aa in seq if HYDROPHOBICITY.get(aa, 0) > 2.0)
-    return round(hydro_count / len(seq), 3)
+    return round(float(counts @ _BETA_LUT / n), 3)
 
 
 def _beta_propensity_score(seq: str) -> float:
-    """Mean β-sheet propensity (0–2 scale; >1.2 = elevated risk)."""
-    if not seq:
-        return 0.0
-    total = sum(BETA_PROPENSITY.get(aa, 1.0) for aa in seq)
-    return round(total / len(seq), 3)
+    return _beta_propensity_vec(_composition(_encode_seq(seq)))
 
 
-def _self_dock_risk(structure: Structure, n_orientations: int = 4, seed: int = 42) -> float:
-    """Dock the binder against a rotated copy of itself and return max interface score.
+def _seq_features(seq: str) -> tuple[float, float, float, float]:
+    """Sequence-derived terms (hydrophobic patch, net charge at pH 7.4, pI, β propensity).
 
-    This is a rough proxy for self-association tendency.  Higher values indicate
-    the binder surface is "sticky" and may self-aggregate.
+    The sequence is encoded once.  The hydrophobic patch is positional and
+    uses the per-residue hydropathy; the other terms depend only on
+    composition and are reductions over a single `np.bincount` vector.
     """
-    rng = np.random.default_rng(seed)
-    max_score = 0.0
+    enc = _encode_seq(seq)
+    counts = _composition(enc)
+    charged = _charged_counts(counts)
 
-    for _ in range(n_orientations):
-        partner = copy.deepcopy(structure)
+    hp = _hydrophobic_patch_vec(_KD_LUT[enc])
+    charge = round(_net_charge_vec(charged, 7.4), 2)
+    pi = _pI_vec(charged)
+    beta = _beta_propensity_vec(counts)
+    return hp, charge, pi, beta
 
-        # Random rotation
-        angles = rng.uniform(0, 2 * np.pi, size=3)
-        cx, sx = np.cos(angles[0]), np.sin(angles[0])
-        cy, sy = np.cos(angles[1]), np.sin(angles[1])
-        cz, sz = np.cos(angles[2]), np.sin(angles[2])
 
-        rot = np.array([
-            [cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
-            [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
-            [-sy, sx * cy, cx * cy],
-        ])
+def _best_orientation_score(
+    base: StateArrays,
+    transforms: list[tuple[np.ndarray, np.ndarray]],
+) -> float:
+    """Score the binder against rigid-body copies of itself; return the best composite.
 
-        # Random translation (20–40 Å away to represent loose association)
-        translation = rng.uniform(20.0, 40.0, size=3)
+    Each partner is the base coordinate arrays mapped through one transform,
+    so no structure is copied or rewritten.
+    """
+    best = 0.0
+    for rot, translation in transforms:
+        ss = score_interface(base, base.transformed(rot, translation), contact_cutoff=10.0)
+        best = max(best, ss.composite)
+    return best
 
-        model = partner[0]
-        for chain in model:
-            for residue in chain:
-                for atom in residue:
-                    xyz = atom.get_vector().get_array()
-                    new_xyz = rot @ xyz + translation
-                    atom.set_coord(new_xyz)
 
-        ss = score_interface(structure, partner, contact_cutoff=10.0)
-        max_score = max(max_score, ss.composite)
+def _self_dock_risk(structure: Structure, n_orientations: int = 4, seed: int = 42) -> float:
+    """Dock the binder against a rotated copy of itself and return max interface score.
+
+    This is a rough proxy for self-association tendency.  Higher values indicate
+    the binder surface is "sticky" and may self-aggregate.  Orientations are
+    scored on up to config.PIPELINE_THREADS threads.
+    """
+    if n_orientations < 1:
+        return 0.0
+
+    rng = np.random.default_rng(seed)
+    base = precompute_state_arrays(structure)
+
+    # Uniformly distributed random rotations, plus random translations
+    # (20–40 Å away to represent loose association)
+    rotations = Rotation.random(n_orientations, random_state=rng).as_matrix()
+    translations = rng.uniform(20.0, 40.0, size=(n_orientations, 3))
+    transforms = list(zip(rotations, translations))
+
+    n_workers = min(n_orientations, config.PIPELINE_THREADS)
+    if n_workers == 1:
+        max_score = _best_orientation_score(base, transforms)
+    else:
+        shares = [transforms[i::n_workers] for i in range(n_workers)]
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            scores = pool.map(lambda share: _best_orientation_score(base, share), shares)
+            max_score = max(scores)
 
     return round(max_score, 3)
 
@@ -168,20 +266,15 @@ def compute_developability(
     Returns a DevelopabilityBreakdown with individual scores and a composite
     score from 0 (worst) to 100 (best), plus a flag (PASS/WARN/FAIL).
     """
-    seq = _extract_full_sequence(structure)
-
-    hp = _hydrophobic_patch_score(seq)
-    charge = round(_net_charge_at_ph(seq, 7.4), 2)
-    pi = _compute_pI(seq)
-    beta = _beta_propensity_score(seq)
+    hp, charge, pi, beta = _seq_features(_extract_full_sequence(structure))
     self_risk = _self_dock_risk(structure, n_orientations=4, seed=seed)
 
     # ── Composite scoring (100 = perfect) ────────────────────────────────
     penalties = 0.0
 
-    # Hydrophobic patch: penalise if > 30% hydrophobic
-    if hp > 0.30:
-        penalties += (hp - 0.30) * 100  # up to ~20 points
+    # Hydrophobic patch: penalise windows with mean KD above ~2.25
+    if hp > 0.50:
+        penalties += (hp - 0.50) * 40  # up to 20 points
 
     # Charge: ideal range –2 to +6 at pH 7.4
     if charge < -2 or charge > 8:
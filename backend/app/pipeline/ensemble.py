@@ -16,7 +16,7 @@ from pathlib import Path
 import numpy as np
 from Bio.PDB import PDBParser, PDBIO
 from Bio.PDB.Structure import Structure
-from scipy.spatial.distance import squareform
+from scipy.spatial.distance import pdist, squareform
 from sklearn.cluster import AgglomerativeClustering
 
 # Try importing OpenMM for optional refinement
@@ -29,92 +29,102 @@ except ImportError:
 BACKBONE_ATOMS = {"N", "CA", "C", "O"}
 
 
-def _get_flexible_atoms(structure: Structure, flex_residues: list[tuple[str, int]]):
-    """Return a list of (chain_id, resi, atom_name, atom_object) for flexible backbone atoms."""
+def _flexible_layout(
+    structure: Structure,
+    flex_residues: list[tuple[str, int]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Locate flexible backbone atoms by their ordinal in ``structure[0].get_atoms()``.
+
+    Returns ``(flex_idx, ca_idx, neighbour_idx)``: the ordinals of all flexible
+    backbone atoms; the Cα ordinal of every flexible residue that has bonded
+    backbone neighbours; and an (n_ca, 3) array of those neighbours' ordinals
+    (own N and C, previous Cα), padded with -1.
+    """
     flex_set = set(flex_residues)
-    atoms = []
-    model = structure[0]
-    for chain in model:
+    flex_idx: list[int] = []
+    ca_idx: list[int] = []
+    neighbour_idx: list[list[int]] = []
+
+    offset = 0
+    for chain in structure[0]:
+        prev_ca = None
         for residue in chain:
-            key = (chain.id, residue.id[1])
-            if key in flex_set:
-                for atom in residue:
-                    if atom.name in BACKBONE_ATOMS:
-                        atoms.append((chain.id, residue.id[1], atom.name, atom))
-    return atoms
+            ordinal = {atom.name: offset + k for k, atom in enumerate(residue)}
+            offset += len(ordinal)
+            flexible = (chain.id, residue.id[1]) in flex_set
+            if flexible:
+                flex_idx.extend(i for name, i in ordinal.items() if name in BACKBONE_ATOMS)
+
+            ca = ordinal.get("CA")
+            if ca is None:
+                prev_ca = None
+                continue
+            if flexible:
+                neighbours = [ordinal[name] for name in ("N", "C") if name in ordinal]
+                if prev_ca is not None:
+                    neighbours.append(prev_ca)
+                if neighbours:
+                    ca_idx.append(ca)
+                    neighbour_idx.append(neighbours + [-1] * (3 - len(neighbours)))
+            prev_ca = ca
+
+    return (
+        np.array(flex_idx, dtype=np.intp),
+        np.array(ca_idx, dtype=np.intp),
+        np.array(neighbour_idx, dtype=np.intp).reshape(-1, 3),
+    )
 
 
-def _perturb_structure(
-    structure: Structure,
-    flex_residues: list[tuple[str, int]],
+def _perturb_coords(
+    base_coords: np.ndarray,
+    flex_idx: np.ndarray,
     rng: np.random.Generator,
+    n_samples: int,
     magnitude: float = 0.8,
-) -> Structure:
-    """Create a copy of the structure with Gaussian noise on flexible backbone atoms.
+) -> np.ndarray:
+    """Return ``n_samples`` copies of the coordinates with Gaussian noise on flexible atoms.
 
-    Magnitude is in Angstroms (std-dev of Gaussian displacement).
+    Magnitude is in Angstroms (std-dev of Gaussian displacement).  The result
+    has shape (n_samples, n_atoms, 3).
     """
-    new_struct = copy.deepcopy(structure)
-    atoms = _get_flexible_atoms(new_struct, flex_residues)
-    for _cid, _resi, _aname, atom in atoms:
-        xyz = atom.get_vector().get_array()
-        noise = rng.normal(0.0, magnitude, size=3)
-        atom.set_coord(xyz + noise)
-    return new_struct
-
-
-def _harmonic_relax(structure: Structure, flex_residues: list[tuple[str, int]], iterations: int = 50):
-    """Very simple in-place harmonic relaxation: pull each flexible atom toward the
+    samples = np.repeat(base_coords[None], n_samples, axis=0)
+    samples[:, flex_idx] += rng.normal(0.0, magnitude, size=(n_samples, len(flex_idx), 3))
+    return samples
+
+
+def _harmonic_relax(
+    coords: np.ndarray,
+    ca_idx: np.ndarray,
+    neighbour_idx: np.ndarray,
+    iterations: int = 50,
+) -> np.ndarray:
+    """Very simple in-place harmonic relaxation: pull each flexible Cα toward the
     centroid of its bonded neighbours to reduce steric strain.
 
     This is NOT a real energy minimiser — it is a fast geometric heuristic that
     smooths out extreme clashes from the Gaussian perturbation step.
-    """
-    model = structure[0]
-    flex_set = set(flex_residues)
 
+    ``coords`` may be a single (n_atoms, 3) conformation or a stacked
+    (n_samples, n_atoms, 3) batch; every Cα is updated simultaneously from the
+    previous iteration's neighbour positions.
+    """
+    if len(ca_idx) == 0:
+        return coords
+    mask = (neighbour_idx >= 0)[..., None]
+    counts = mask.sum(axis=1)
     for _ in range(iterations):
-        for chain in model:
-            prev_ca = None
-            for residue in chain:
-                key = (chain.id, residue.id[1])
-                ca = residue["CA"] if "CA" in residue else None
-                if ca is None:
-                    prev_ca = None
-                    continue
-
-                if key in flex_set:
-                    # Pull CA toward its immediate intra-residue backbone neighbours
-                    neighbours = []
-                    for aname in ("N", "C"):
-                        if aname in residue:
-                            neighbours.append(residue[aname].get_vector().get_array())
-                    if prev_ca is not None:
-                        neighbours.append(prev_ca.get_vector().get_array())
-
-                    if neighbours:
-                        centroid = np.mean(neighbours, axis=0)
-                        current = ca.get_vector().get_array()
-                        ca.set_coord(current * 0.7 + centroid * 0.3)
-
-                prev_ca = ca
-    return structure
-
-
-def _rmsd_between(s1: Structure, s2: Structure, flex_residues: list[tuple[str, int]]) -> float:
-    """Compute backbone RMSD over flexible residues between two structures."""
-    coords1 = []
-    coords2 = []
-    for struct, clist in [(s1, coords1), (s2, coords2)]:
-        for atom_info in _get_flexible_atoms(struct, flex_residues):
-            clist.append(atom_info[3].get_vector().get_array())
-
-    if len(coords1) != len(coords2) or len(coords1) == 0:
-        return 999.0
-
-    c1 = np.array(coords1)
-    c2 = np.array(coords2)
-    return float(np.sqrt(np.mean(np.sum((c1 - c2) ** 2, axis=1))))
+        neighbours = np.where(mask, coords[..., neighbour_idx, :], 0.0)
+        centroid = neighbours.sum(axis=-2) / counts
+        coords[..., ca_idx, :] = coords[..., ca_idx, :] * 0.7 + centroid * 0.3
+    return coords
+
+
+def _with_coords(template: Structure, coords: np.ndarray) -> Structure:
+    """Clone ``template`` and write ``coords`` (in ``get_atoms()`` order) into model 0."""
+    new_struct = copy.deepcopy(template)
+    for atom, xyz in zip(new_struct[0].get_atoms(), coords):
+        atom.set_coord(xyz)
+    return new_struct
 
 
 def generate_ensemble(
@@ -128,27 +138,34 @@ def generate_ensemble(
 ) -> list[Structure]:
     """Generate and cluster an ensemble of perturbed binder conformations.
 
+    Sampling and relaxation operate on coordinate arrays; only the returned
+    representatives are materialised as Structures.
+
     Returns `n_clusters` representative structures (cluster medoids).
     """
     rng = np.random.default_rng(seed)
 
-    # Generate raw samples
-    samples: list[Structure] = [copy.deepcopy(binder_structure)]  # include the original
-    for _ in range(n_samples - 1):
-        s = _perturb_structure(binder_structure, flex_residues, rng, magnitude)
-        _harmonic_relax(s, flex_residues, iterations=40)
-        samples.append(s)
+    base_coords = np.array([atom.get_coord() for atom in binder_structure[0].get_atoms()], dtype=np.float64)
+    flex_idx, ca_idx, neighbour_idx = _flexible_layout(binder_structure, flex_residues)
+
+    # Generate raw samples; sample 0 is the original conformation
+    perturbed = _perturb_coords(base_coords, flex_idx, rng, n_samples - 1, magnitude)
+    _harmonic_relax(perturbed, ca_idx, neighbour_idx, iterations=40)
+    samples = np.concatenate([base_coords[None], perturbed])
 
     if len(samples) <= n_clusters:
-        return samples
+        return [_with_coords(binder_structure, coords) for coords in samples]
 
-    # Build pairwise RMSD matrix
+    # Build pairwise RMSD matrix: Euclidean distance between flattened
+    # flexible-atom coordinates, normalised by sqrt(n_atoms)
     n = len(samples)
-    condensed = []
-    for i in range(n):
-        for j in range(i + 1, n):
-            condensed.append(_rmsd_between(samples[i], samples[j], flex_residues))
-    dist_matrix = squareform(condensed)
+    n_flex = len(flex_idx)
+    if n_flex == 0:
+        dist_matrix = np.full((n, n), 999.0)
+        np.fill_diagonal(dist_matrix, 0.0)
+    else:
+        flat = samples[:, flex_idx].reshape(n, -1)
+        dist_matrix = squareform(pdist(flat) / np.sqrt(n_flex))
 
     # Agglomerative clustering
     clust = AgglomerativeClustering(
@@ -163,12 +180,12 @@ def generate_ensemble(
     for cid in range(int(labels.max()) + 1):
         members = np.where(labels == cid)[0]
         if len(members) == 1:
-            representatives.append(samples[members[0]])
+            representatives.append(_with_coords(binder_structure, samples[members[0]]))
             continue
         # Medoid = member with smallest average distance to other members
         sub = dist_matrix[np.ix_(members, members)]
         medoid_local = int(np.argmin(sub.mean(axis=1)))
-        representatives.append(samples[members[medoid_local]])
+        representatives.append(_with_coords(binder_structure, samples[members[medoid_local]]))
 
     return representatives
 
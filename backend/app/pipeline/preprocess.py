@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 import warnings
 from pathlib import Path
 from typing import Optional
@@ -12,6 +13,7 @@ from Bio.PDB.Structure import Structure
 from Bio.PDB.Model import Model
 from Bio.PDB.Chain import Chain
 from Bio.PDB.Residue import Residue
+from scipy.spatial import cKDTree
 
 warnings.filterwarnings("ignore", category=Warning, module="Bio.PDB")
 
@@ -21,6 +23,21 @@ ANTIBODY_CDR_RANGES: dict[str, list[tuple[int, int]]] = {
     "L": [(24, 34), (50, 56), (89, 97)],    # CDR-L1, L2, L3
 }
 
+# Three-letter to single-letter codes for the 20 standard amino acids.
+THREE_TO_ONE: dict[str, str] = {
+    "ALA": "A", "ARG": "R", "ASN": "N", "ASP": "D", "CYS": "C",
+    "GLN": "Q", "GLU": "E", "GLY": "G", "HIS": "H", "ILE": "I",
+    "LEU": "L", "LYS": "K", "MET": "M", "PHE": "F", "PRO": "P",
+    "SER": "S", "THR": "T", "TRP": "W", "TYR": "Y", "VAL": "V",
+}
+
+# Key under which extract_sequence memoises its result in ``Structure.xtra``.
+# Code that renames residues in place must drop it.
+SEQUENCE_CACHE_KEY = "flexbind_sequences"
+
+# PDBParser reused across clean_pdb calls, one per thread (see _default_parser)
+_PARSER_LOCAL = threading.local()
+
 
 class CleanSelect(Select):
     """Keep only standard amino-acid ATOM records (no HETATM, water, etc.)."""
@@ -37,16 +54,63 @@ class CleanSelect(Select):
         return 1 if not atom.is_disordered() or atom.get_altloc() == "A" else 0
 
 
-def clean_pdb(input_path: Path, output_path: Path) -> Structure:
-    """Parse, clean, and write a sanitised PDB. Returns the cleaned structure."""
-    parser = PDBParser(QUIET=True)
-    structure = parser.get_structure("mol", str(input_path))
+def _apply_selection(structure: Structure, select: Select) -> None:
+    """Detach in place everything `select` would stop PDBIO from writing.
+
+    Disordered atoms keep only the alternate locations `select` accepts; atoms
+    left with none, and chains left without residues, are removed.
+    """
+    for model in structure:
+        for chain in list(model):
+            for residue in list(chain):
+                if not select.accept_residue(residue):
+                    chain.detach_child(residue.id)
+                    continue
+                for atom in list(residue):
+                    if atom.is_disordered() != 2:
+                        continue
+                    for altloc in atom.disordered_get_id_list():
+                        if not select.accept_atom(atom.disordered_get(altloc)):
+                            atom.disordered_remove(altloc)
+                    if not atom.disordered_get_id_list():
+                        residue.detach_child(atom.id)
+            if not len(chain):
+                model.detach_child(chain.id)
+
+
+def _default_parser() -> PDBParser:
+    """Return this thread's shared PDBParser.
+
+    Pipelines run one at a time in each worker process (see app.worker),
+    so in practice this is one parser per process.  It is still kept per
+    thread because a parser holds per-parse state on the instance, and
+    clean_pdb may be called from concurrent threads outside the pool.
+    """
+    parser = getattr(_PARSER_LOCAL, "parser", None)
+    if parser is None:
+        parser = _PARSER_LOCAL.parser = PDBParser(QUIET=True)
+    return parser
+
+
+def clean_pdb(
+    input_path: Path,
+    output_path: Path,
+    parser: Optional[PDBParser] = None,
+) -> Structure:
+    """Parse, clean, and write a sanitised PDB. Returns the cleaned structure.
+
+    The input is parsed once and filtered in memory, so the returned structure
+    matches what was written without re-reading `output_path`.
+    """
+    parser = parser or _default_parser()
+    structure = parser.get_structure("clean", str(input_path))
+    _apply_selection(structure, CleanSelect())
 
     io = PDBIO()
     io.set_structure(structure)
-    io.save(str(output_path), CleanSelect())
+    io.save(str(output_path))
 
-    return parser.get_structure("clean", str(output_path))
+    return structure
 
 
 def get_ca_coords(structure: Structure) -> dict[tuple[str, int], np.ndarray]:
@@ -56,7 +120,7 @@ def get_ca_coords(structure: Structure) -> dict[tuple[str, int], np.ndarray]:
     for chain in model:
         for residue in chain:
             if "CA" in residue:
-                coords[(chain.id, residue.id[1])] = residue["CA"].get_vector().get_array()
+                coords[(chain.id, residue.id[1])] = residue["CA"].get_coord()
     return coords
 
 
@@ -73,14 +137,21 @@ def detect_interface_residues(
         raise ValueError("One or both structures have no Cα atoms after cleaning.")
 
     target_xyz = np.array(list(target_ca.values()))
-    interface: list[tuple[str, int]] = []
+    binder_xyz = np.array(list(binder_ca.values()))
 
-    for key, bxyz in binder_ca.items():
-        dists = np.linalg.norm(target_xyz - bxyz, axis=1)
-        if dists.min() < cutoff_angstrom:
-            interface.append(key)
+    # Only target atoms inside the binder's bounding box grown by the cutoff
+    # can be within range of any binder Cα
+    lo = binder_xyz.min(axis=0) - cutoff_angstrom
+    hi = binder_xyz.max(axis=0) + cutoff_angstrom
+    target_xyz = target_xyz[((target_xyz >= lo) & (target_xyz <= hi)).all(axis=1)]
+    if len(target_xyz) == 0:
+        return []
 
-    return interface
+    # Count target Cα within the cutoff of every binder Cα in one tree query
+    tree = cKDTree(target_xyz)
+    n_hits = tree.query_ball_point(binder_xyz, cutoff_angstrom, return_length=True)
+
+    return [key for key, hits in zip(binder_ca, n_hits) if hits > 0]
 
 
 def detect_cdr_residues(
@@ -135,18 +206,25 @@ def get_flexible_residues(
 
 
 def extract_sequence(structure: Structure) -> dict[str, str]:
-    """Extract single-letter amino-acid sequences per chain."""
-    from Bio.PDB.Polypeptide import three_to_one
+    """Extract single-letter amino-acid sequences per chain.
+
+    The result is cached on the structure (see SEQUENCE_CACHE_KEY), so
+    repeated calls on the same object only walk the residues once.
+    """
+    cached = structure.xtra.get(SEQUENCE_CACHE_KEY)
+    if cached is not None:
+        return dict(cached)
 
     sequences: dict[str, str] = {}
     model: Model = structure[0]
     for chain in model:
         seq_chars: list[str] = []
         for residue in chain:
-            try:
-                seq_chars.append(three_to_one(residue.get_resname()))
-            except KeyError:
-                continue
+            one = THREE_TO_ONE.get(residue.get_resname())
+            if one:
+                seq_chars.append(one)
         if seq_chars:
             sequences[chain.id] = "".join(seq_chars)
-    return sequences
+
+    structure.xtra[SEQUENCE_CACHE_KEY] = sequences
+    return dict(sequences)
@@ -1,18 +1,18 @@
 """Pipeline runner — orchestrates Steps A through F.
 
-Called by the Celery worker.  All state is persisted to the job directory
-on disk so the API can serve progress updates and final results.
+Runs in a pipeline worker process (see app.worker).  All state is persisted
+to the job directory on disk so the API can serve progress updates and final
+results.
 """
 
 from __future__ import annotations
 
 import csv
+import io
 import json
 import zipfile
 from pathlib import Path
 
-from Bio.PDB import PDBParser
-
 from app import config
 from app.models import (
     BinderType,
@@ -25,11 +25,8 @@ from app.models import (
 )
 from app.utils import append_log, job_dir, set_progress, set_status, read_meta, write_meta
 
-from app.pipeline.preprocess import clean_pdb, get_flexible_residues, extract_sequence
-from app.pipeline.ensemble import generate_ensemble, save_ensemble
-from app.pipeline.scoring import score_ensemble
-from app.pipeline.sequence_design import design_sequences
-from app.pipeline.developability import compute_developability
+# Write buffer for results.zip
+ZIP_BUFFER_SIZE = 1 << 20
 
 
 def run_pipeline(job_id: str) -> None:
@@ -38,9 +35,16 @@ def run_pipeline(job_id: str) -> None:
     Reads configuration from jobs/<job_id>/meta.json, writes results
     back to the job directory, and updates status/progress as it goes.
     """
+    # Step modules pull in Biopython, scipy and scikit-learn; import them only
+    # when a job actually runs
+    from app.pipeline.preprocess import clean_pdb, get_flexible_residues
+    from app.pipeline.ensemble import generate_ensemble, save_ensemble
+    from app.pipeline.scoring import precompute_state_arrays, score_ensemble
+    from app.pipeline.sequence_design import design_sequences
+    from app.pipeline.developability import compute_developability
+
     jdir = job_dir(job_id)
     meta = read_meta(job_id)
-    parser = PDBParser(QUIET=True)
 
     mode = RunMode(meta["mode"])
     binder_type = BinderType(meta["binder_type"])
@@ -107,7 +111,9 @@ def run_pipeline(job_id: str) -> None:
         # ── Step C: Score ensemble ──────────────────────────────────────────
         set_progress(job_id, 0.40, "Step C: Scoring ensemble against target…")
 
-        state_scores = score_ensemble(target_struct, ensemble)
+        target_arrays = precompute_state_arrays(target_struct)
+        ensemble_arrays = [precompute_state_arrays(state) for state in ensemble]
+        state_scores = score_ensemble(target_arrays, ensemble_arrays)
         append_log(
             job_id,
             f"  Scores — mean composite: {sum(s.composite for s in state_scores)/len(state_scores):.2f}"
@@ -126,6 +132,7 @@ def run_pipeline(job_id: str) -> None:
             beam_width=beam_width,
             seed=seed,
             no_glycosylation=no_glyco,
+            state_scores=state_scores,
         )
         append_log(job_id, f"  Generated {len(design_results)} design candidates")
         set_progress(job_id, 0.75, "Step D: Done")
@@ -158,7 +165,7 @@ def run_pipeline(job_id: str) -> None:
                 ],
             ))
 
-        # Write report.json
+        # report.json
         report = JobReport(
             job_id=job_id,
             status=JobStatus.DONE,
@@ -169,37 +176,47 @@ def run_pipeline(job_id: str) -> None:
             designs=designs,
             developability=dev_score,
         )
-        report_path = jdir / "report.json"
-        with open(report_path, "w") as f:
-            f.write(report.model_dump_json(indent=2))
-
-        # Write designs.csv
-        csv_path = jdir / "designs.csv"
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.writer(f)
+        report_bytes = report.model_dump_json(indent=2).encode()
+
+        # designs.csv
+        csv_buf = io.StringIO(newline="")
+        writer = csv.writer(csv_buf)
+        writer.writerow([
+            "rank", "sequence", "mutations", "mean_score", "worst_score",
+            "robustness", "developability_score", "developability_flag",
+        ])
+        for d in designs:
             writer.writerow([
-                "rank", "sequence", "mutations", "mean_score", "worst_score",
-                "robustness", "developability_score", "developability_flag",
+                d.rank, d.sequence, d.mutations, d.mean_score, d.worst_score,
+                d.robustness, d.developability_score, d.developability_flag,
             ])
-            for d in designs:
-                writer.writerow([
-                    d.rank, d.sequence, d.mutations, d.mean_score, d.worst_score,
-                    d.robustness, d.developability_score, d.developability_flag,
-                ])
-
-        # Write FASTA
-        fasta_path = jdir / "designs.fasta"
-        with open(fasta_path, "w") as f:
-            for d in designs:
-                f.write(f">design_{d.rank:03d} mutations={d.mutations} robustness={d.robustness}\n")
-                f.write(d.sequence + "\n")
-
-        # Build ZIP
+        csv_bytes = csv_buf.getvalue().encode()
+
+        # designs.fasta
+        fasta_bytes = "".join(
+            f">design_{d.rank:03d} mutations={d.mutations} robustness={d.robustness}\n{d.sequence}\n"
+            for d in designs
+        ).encode()
+
+        # Write each output once to disk and straight into the ZIP, rather
+        # than writing the files and reading them back for packaging
+        outputs = {
+            "report.json": report_bytes,
+            "designs.csv": csv_bytes,
+            "designs.fasta": fasta_bytes,
+        }
+        for name, data in outputs.items():
+            (jdir / name).write_bytes(data)
+
+        # The archive is assembled from many small writes (member headers,
+        # deflate blocks), so give it a 1 MiB buffer instead of the 8 KiB default
         zip_path = jdir / "results.zip"
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            zf.write(report_path, "report.json")
-            zf.write(csv_path, "designs.csv")
-            zf.write(fasta_path, "designs.fasta")
+        with (
+            open(zip_path, "wb", buffering=ZIP_BUFFER_SIZE) as zip_fh,
+            zipfile.ZipFile(zip_fh, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf,
+        ):
+            for name, data in outputs.items():
+                zf.writestr(name, data)
             zf.write(target_clean, "target_clean.pdb")
             zf.write(binder_clean, "binder_clean.pdb")
             for ep in ens_paths:
@@ -209,6 +226,6 @@ def run_pipeline(job_id: str) -> None:
         set_status(job_id, JobStatus.DONE, "All steps completed successfully")
 
     except Exception as exc:
-        set_status(job_id, JobStatus.FAILED, str(exc))
         append_log(job_id, f"FATAL ERROR: {exc}")
+        set_status(job_id, JobStatus.FAILED, str(exc))
         raise
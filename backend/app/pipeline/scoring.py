@@ -15,9 +15,16 @@ All terms are combined into a single composite score (higher = better binding).
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Union
+
 import numpy as np
 from Bio.PDB.Structure import Structure
+from scipy.spatial import cKDTree
 
+from app import config
 from app.models import StateScore
 
 
@@ -30,59 +37,118 @@ KD_SCALE: dict[str, float] = {
 }
 
 
-def _get_all_coords(structure: Structure) -> tuple[np.ndarray, list[dict]]:
-    """Return Nx3 coordinate array and metadata list for all atoms in model 0."""
-    coords = []
-    info = []
-    model = structure[0]
-    for chain in model:
-        for residue in chain:
-            for atom in residue:
-                coords.append(atom.get_vector().get_array())
-                info.append({
-                    "chain": chain.id,
-                    "resi": residue.id[1],
-                    "resn": residue.get_resname(),
-                    "atom": atom.name,
-                    "element": atom.element,
-                })
-    return np.array(coords) if coords else np.zeros((0, 3)), info
-
-
-def _get_cb_coords(structure: Structure) -> tuple[np.ndarray, list[dict]]:
-    """Return Cβ (or Cα for GLY) coordinates and metadata."""
+def _get_all_coords(structure: Structure) -> tuple[np.ndarray, np.ndarray]:
+    """Return the Nx3 coordinate array and (N,) atom-name array for all atoms in model 0."""
+    atoms = list(structure[0].get_atoms())
+    if not atoms:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros(0, dtype="S4")
+    coords = np.array([atom.get_coord() for atom in atoms], dtype=np.float32)
+    names = np.array([atom.get_name() for atom in atoms], dtype="S4")
+    return coords, names
+
+
+def _get_cb_coords(structure: Structure) -> np.ndarray:
+    """Return Cβ (or Cα for GLY) coordinates, one row per residue."""
     coords = []
-    info = []
-    model = structure[0]
-    for chain in model:
-        for residue in chain:
-            atom_name = "CB" if "CB" in residue else ("CA" if "CA" in residue else None)
-            if atom_name is None:
-                continue
-            atom = residue[atom_name]
-            coords.append(atom.get_vector().get_array())
-            info.append({
-                "chain": chain.id,
-                "resi": residue.id[1],
-                "resn": residue.get_resname(),
-            })
-    return np.array(coords) if coords else np.zeros((0, 3)), info
+    for residue in structure[0].get_residues():
+        atom_name = "CB" if "CB" in residue else ("CA" if "CA" in residue else None)
+        if atom_name is None:
+            continue
+        coords.append(residue[atom_name].get_coord())
+    return np.array(coords, dtype=np.float32) if coords else np.zeros((0, 3), dtype=np.float32)
+
+
+@dataclass(frozen=True)
+class StateArrays:
+    """Coordinate arrays read by `score_interface`, extracted once per structure.
+
+    `cb_xyz` holds one Cβ (Cα for GLY) per residue; `all_xyz` holds every
+    atom of model 0, with `n_idx` / `o_idx` indexing its backbone N and O
+    rows.  Coordinates are float32, the precision Biopython parses them at.
+    """
+
+    cb_xyz: np.ndarray
+    all_xyz: np.ndarray
+    n_idx: np.ndarray
+    o_idx: np.ndarray
+
+    def transformed(self, rot: np.ndarray, translation: np.ndarray) -> StateArrays:
+        """Rigid-body copy: coordinates mapped through ``x @ rot.T + translation``."""
+        return StateArrays(
+            cb_xyz=(self.cb_xyz @ rot.T + translation).astype(np.float32),
+            all_xyz=(self.all_xyz @ rot.T + translation).astype(np.float32),
+            n_idx=self.n_idx,
+            o_idx=self.o_idx,
+        )
+
+
+def precompute_state_arrays(structure: Structure) -> StateArrays:
+    """Extract the scoring arrays of a structure (model 0)."""
+    all_xyz, names = _get_all_coords(structure)
+    return StateArrays(
+        cb_xyz=_get_cb_coords(structure),
+        all_xyz=all_xyz,
+        n_idx=np.flatnonzero(names == b"N"),
+        o_idx=np.flatnonzero(names == b"O"),
+    )
+
+
+def _as_arrays(state: Union[Structure, StateArrays]) -> StateArrays:
+    return state if isinstance(state, StateArrays) else precompute_state_arrays(state)
+
+
+def _tree(coords: np.ndarray) -> cKDTree:
+    """KD-tree for a single scoring call.
+
+    Trees are queried a handful of times and then discarded, so the
+    median-balancing and node-compaction passes (which speed up long-lived
+    trees) cost more than they save.
+    """
+    return cKDTree(coords, balanced_tree=False, compact_nodes=False)
+
+
+def _strict(radius: float) -> float:
+    """Largest radius below `radius`.
+
+    KD-tree queries count distances ``<= r``; passing this instead keeps the
+    scoring terms' strict ``d < cutoff`` semantics for pairs exactly on a cutoff.
+    """
+    return float(np.nextafter(radius, 0.0))
+
+
+def _count_pairs_in_shell(
+    a: np.ndarray,
+    b: np.ndarray,
+    dist_range: tuple[float, float],
+) -> int:
+    """Count pairs (one point from each set) with lo < distance < hi."""
+    if len(a) == 0 or len(b) == 0:
+        return 0
+    lo, hi = dist_range
+    within = _tree(a).count_neighbors(_tree(b), np.array([lo, _strict(hi)]))
+    return int(within[1] - within[0])
 
 
 def score_interface(
-    target_structure: Structure,
-    binder_structure: Structure,
+    target_structure: Union[Structure, StateArrays],
+    binder_structure: Union[Structure, StateArrays],
     contact_cutoff: float = 8.0,
     clash_cutoff: float = 2.0,
     hbond_dist_range: tuple[float, float] = (2.5, 3.5),
 ) -> StateScore:
     """Score the interface between target and binder structures.
 
+    Either side may be given as precomputed `StateArrays` to skip
+    coordinate extraction.
+
     Returns a StateScore with individual terms and a composite.
     """
+    target = _as_arrays(target_structure)
+    binder = _as_arrays(binder_structure)
+
     # ── Contact score (Cβ–Cβ) ───────────────────────────────────────────────
-    t_cb, t_info = _get_cb_coords(target_structure)
-    b_cb, b_info = _get_cb_coords(binder_structure)
+    t_cb = target.cb_xyz
+    b_cb = binder.cb_xyz
 
     if t_cb.shape[0] == 0 or b_cb.shape[0] == 0:
         return StateScore(
@@ -90,68 +156,35 @@ def score_interface(
             hbond_proxy=0, sasa_burial=0, composite=0,
         )
 
-    # Pairwise distances (target × binder)
-    diff = t_cb[:, None, :] - b_cb[None, :, :]  # (T, B, 3)
-    dists = np.sqrt(np.sum(diff**2, axis=2))     # (T, B)
+    # Neighbour queries only visit pairs within each cutoff
+    t_cb_tree = _tree(t_cb)
+    b_cb_tree = _tree(b_cb)
 
-    contacts = int(np.sum(dists < contact_cutoff))
-    contact_score = min(contacts / max(len(b_info), 1) * 10.0, 100.0)
+    contacts = int(t_cb_tree.count_neighbors(b_cb_tree, _strict(contact_cutoff)))
+    contact_score = min(contacts / max(len(b_cb), 1) * 10.0, 100.0)
 
     # ── Clash score (all-atom) ──────────────────────────────────────────────
-    t_all, t_all_info = _get_all_coords(target_structure)
-    b_all, b_all_info = _get_all_coords(binder_structure)
+    t_all = target.all_xyz
+    b_all = binder.all_xyz
 
     if t_all.shape[0] > 0 and b_all.shape[0] > 0:
-        # Subsample for speed if structures are large
-        max_atoms = 3000
-        if t_all.shape[0] > max_atoms:
-            idx = np.linspace(0, t_all.shape[0] - 1, max_atoms, dtype=int)
-            t_all = t_all[idx]
-        if b_all.shape[0] > max_atoms:
-            idx = np.linspace(0, b_all.shape[0] - 1, max_atoms, dtype=int)
-            b_all = b_all[idx]
-
-        diff_all = t_all[:, None, :] - b_all[None, :, :]
-        dists_all = np.sqrt(np.sum(diff_all**2, axis=2))
-        n_clashes = int(np.sum(dists_all < clash_cutoff))
+        n_clashes = int(_tree(t_all).count_neighbors(_tree(b_all), _strict(clash_cutoff)))
         clash_score = max(0.0, 1.0 - n_clashes * 0.5)  # penalise clashes
     else:
         clash_score = 1.0
 
     # ── H-bond proxy (backbone N…O pairs across interface) ──────────────────
-    hbond_count = 0
-    # Use backbone N/O atoms only
-    t_donors = np.array([c for c, i in zip(t_all.tolist(), t_all_info) if i.get("atom") == "N"]) if len(t_all_info) > 0 else np.zeros((0, 3))
-    b_acceptors = np.array([c for c, i in zip(b_all.tolist(), b_all_info) if i.get("atom") == "O"]) if len(b_all_info) > 0 else np.zeros((0, 3))
-
-    if len(t_donors) > 0 and len(b_acceptors) > 0:
-        t_donors = np.array(t_donors)
-        b_acceptors = np.array(b_acceptors)
-        diff_hb = t_donors[:, None, :] - b_acceptors[None, :, :]
-        dists_hb = np.sqrt(np.sum(diff_hb**2, axis=2))
-        hbond_count += int(np.sum((dists_hb > hbond_dist_range[0]) & (dists_hb < hbond_dist_range[1])))
-
+    hbond_count = _count_pairs_in_shell(t_all[target.n_idx], b_all[binder.o_idx], hbond_dist_range)
     # Reverse (binder N → target O)
-    b_donors = np.array([c for c, i in zip(b_all.tolist(), b_all_info) if i.get("atom") == "N"]) if len(b_all_info) > 0 else np.zeros((0, 3))
-    t_acceptors = np.array([c for c, i in zip(t_all.tolist(), t_all_info) if i.get("atom") == "O"]) if len(t_all_info) > 0 else np.zeros((0, 3))
-
-    if len(b_donors) > 0 and len(t_acceptors) > 0:
-        b_donors = np.array(b_donors)
-        t_acceptors = np.array(t_acceptors)
-        diff_hb2 = b_donors[:, None, :] - t_acceptors[None, :, :]
-        dists_hb2 = np.sqrt(np.sum(diff_hb2**2, axis=2))
-        hbond_count += int(np.sum((dists_hb2 > hbond_dist_range[0]) & (dists_hb2 < hbond_dist_range[1])))
+    hbond_count += _count_pairs_in_shell(b_all[binder.n_idx], t_all[target.o_idx], hbond_dist_range)
 
     hbond_proxy = min(hbond_count / 5.0, 10.0)
 
     # ── SASA burial proxy ───────────────────────────────────────────────────
-    # Approximate: for each binder Cβ, count how many target Cβ are within 10 Å
-    if t_cb.shape[0] > 0 and b_cb.shape[0] > 0:
-        close_counts = np.sum(dists < 10.0, axis=0)  # per binder residue
-        burial_fraction = float(np.mean(close_counts > 0))
-        sasa_burial = burial_fraction * 10.0
-    else:
-        sasa_burial = 0.0
+    # Approximate: fraction of binder Cβ with at least one target Cβ within 10 Å
+    close_counts = t_cb_tree.query_ball_point(b_cb, _strict(10.0), return_length=True)
+    burial_fraction = float(np.mean(close_counts > 0))
+    sasa_burial = burial_fraction * 10.0
 
     # ── Composite ───────────────────────────────────────────────────────────
     composite = (
@@ -172,13 +205,21 @@ def score_interface(
 
 
 def score_ensemble(
-    target_structure: Structure,
-    ensemble: list[Structure],
+    target_structure: Union[Structure, StateArrays],
+    ensemble: list[Union[Structure, StateArrays]],
 ) -> list[StateScore]:
-    """Score each ensemble member against the target. Returns a list of StateScores."""
-    scores: list[StateScore] = []
-    for i, binder in enumerate(ensemble):
-        ss = score_interface(target_structure, binder)
+    """Score each ensemble member against the target. Returns a list of StateScores.
+
+    States are scored on up to config.PIPELINE_THREADS threads.
+    """
+    target = _as_arrays(target_structure)
+    n_workers = min(len(ensemble), config.PIPELINE_THREADS)
+    if n_workers <= 1:
+        scores = [score_interface(target, binder) for binder in ensemble]
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            scores = list(pool.map(score_interface, repeat(target), ensemble))
+
+    for i, ss in enumerate(scores):
         ss.state_index = i
-        scores.append(ss)
     return scores
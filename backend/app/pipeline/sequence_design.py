@@ -10,14 +10,14 @@ provides a credible working baseline without any external model weights.
 
 from __future__ import annotations
 
-import copy
+import re
 from typing import Optional
 
 import numpy as np
 from Bio.PDB.Structure import Structure
-from Bio.PDB.Polypeptide import three_to_one, one_to_three
 
-from app.pipeline.scoring import score_interface
+from app.pipeline.preprocess import THREE_TO_ONE
+from app.pipeline.scoring import score_ensemble
 from app.models import StateScore
 
 
@@ -34,12 +34,12 @@ COMPATIBLE_GROUPS: dict[str, list[str]] = {
 }
 
 # Glycosylation motif: N-X-S/T where X ≠ P
+_GLYCO_RE = re.compile(r"N[^P][ST]")
+
+
 def _has_glycosylation_motif(seq: str) -> bool:
     """Check if sequence contains N-X-S/T motif (X ≠ P)."""
-    for i in range(len(seq) - 2):
-        if seq[i] == "N" and seq[i + 1] != "P" and seq[i + 2] in ("S", "T"):
-            return True
-    return False
+    return _GLYCO_RE.search(seq) is not None
 
 
 def _get_aa_group(aa: str) -> str:
@@ -65,30 +65,19 @@ def _smart_candidates(current_aa: str, allowed: Optional[set[str]] = None) -> li
     return candidates
 
 
-def _apply_mutation(
+def _interface_letters(
     structure: Structure,
-    chain_id: str,
-    resi: int,
-    new_aa_1: str,
-) -> Structure:
-    """Apply a point mutation by changing the residue name (proxy: we keep
-    the backbone and Cβ but label with the new residue identity).
-
-    This is a simplified proxy — in a production system you'd repack
-    side-chains.  For scoring purposes, the backbone geometry (which
-    drives our contact/clash/hbond scoring) is unchanged.
-    """
-    new_struct = copy.deepcopy(structure)
-    model = new_struct[0]
-    new_aa_3 = one_to_three(new_aa_1)
-
-    for chain in model:
-        if chain.id == chain_id:
-            for residue in chain:
-                if residue.id[1] == resi:
-                    residue.resname = new_aa_3
-                    break
-    return new_struct
+    positions: list[tuple[str, int]],
+) -> list[str]:
+    """Single-letter code at each position ("" where the residue is absent)."""
+    index: dict[tuple[str, int], str] = {}
+    for chain in structure[0]:
+        for residue in chain:
+            index.setdefault((chain.id, residue.id[1]), residue.get_resname())
+    return [
+        THREE_TO_ONE.get(index[pos], "X") if pos in index else ""
+        for pos in positions
+    ]
 
 
 def _extract_interface_sequence(
@@ -96,51 +85,39 @@ def _extract_interface_sequence(
     positions: list[tuple[str, int]],
 ) -> str:
     """Extract the single-letter sequence at given positions."""
-    model = structure[0]
-    seq: list[str] = []
-    for chain_id, resi in positions:
-        for chain in model:
-            if chain.id == chain_id:
-                for residue in chain:
-                    if residue.id[1] == resi:
-                        try:
-                            seq.append(three_to_one(residue.get_resname()))
-                        except KeyError:
-                            seq.append("X")
-                        break
-    return "".join(seq)
+    return "".join(_interface_letters(structure, positions))
 
 
-def _score_design_multistate(
-    target: Structure,
-    binder: Structure,
-    ensemble: list[Structure],
+def _designed_sequence(
+    wildtype: list[tuple[tuple[str, int], str]],
     mutations: list[tuple[str, int, str]],
+) -> str:
+    """Sequence over the designable positions with `mutations` substituted.
+
+    `wildtype` pairs each designable position, in order, with its wild-type
+    letter ("" if the residue is absent from the binder).  A mutation only
+    relabels a residue, so no structure needs to be copied or re-read.
+    """
+    mutated = {(c, r): aa for c, r, aa in mutations}
+    return "".join(mutated.get(pos, aa) for pos, aa in wildtype)
+
+
+def _score_design_multistate(
+    state_scores: list[StateScore],
 ) -> tuple[float, float, list[StateScore]]:
-    """Score a set of mutations across all ensemble states.
+    """Summarise a design's scores across all ensemble states.
+
+    Mutations only relabel residues, and the interface score depends on
+    backbone/Cβ geometry alone, so every mutation set scores exactly like
+    the unmutated ensemble.  `state_scores` is therefore computed once per
+    design run and shared by all candidates.
 
     Returns (mean_score, worst_score, per_state_scores).
     """
-    # Apply mutations to the canonical binder
-    mutated = copy.deepcopy(binder)
-    for chain_id, resi, new_aa in mutations:
-        mutated = _apply_mutation(mutated, chain_id, resi, new_aa)
-
-    per_state: list[StateScore] = []
-    for i, state in enumerate(ensemble):
-        # For each ensemble state, create a version with mutations applied
-        mutated_state = copy.deepcopy(state)
-        for chain_id, resi, new_aa in mutations:
-            mutated_state = _apply_mutation(mutated_state, chain_id, resi, new_aa)
-
-        ss = score_interface(target, mutated_state)
-        ss.state_index = i
-        per_state.append(ss)
-
-    composites = [s.composite for s in per_state]
+    composites = [s.composite for s in state_scores]
     mean_s = float(np.mean(composites))
     worst_s = float(np.min(composites))
-    return mean_s, worst_s, per_state
+    return mean_s, worst_s, state_scores
 
 
 def design_sequences(
@@ -154,9 +131,13 @@ def design_sequences(
     fixed_positions: Optional[set[tuple[str, int]]] = None,
     allowed_aas: Optional[dict[tuple[str, int], set[str]]] = None,
     no_glycosylation: bool = True,
+    state_scores: Optional[list[StateScore]] = None,
 ) -> list[dict]:
     """Run a beam-search sequence design over designable positions.
 
+    `state_scores` are the ensemble's per-state scores against `target`; pass
+    them when already computed (Step C) to avoid scoring the ensemble again.
+
     Returns a list of design dicts sorted by robustness score (worst-case weighted).
     """
     rng = np.random.default_rng(seed)
@@ -166,29 +147,38 @@ def design_sequences(
     # Determine mutable positions
     mutable = [(c, r) for c, r in designable_positions if (c, r) not in fixed]
 
+    # Wild-type letter at every designable position, read once
+    wildtype = list(zip(designable_positions, _interface_letters(binder, designable_positions)))
+    wt_aa = dict(wildtype)
+
+    # Geometric interface terms per ensemble state are mutation-invariant,
+    # so every candidate shares one multi-state summary
+    if state_scores is None:
+        state_scores = score_ensemble(target, ensemble)
+    mean_s, worst_s, per_state = _score_design_multistate(state_scores)
+    robustness = worst_s * 0.6 + mean_s * 0.4
+
     if not mutable:
         # Nothing to design — score the wildtype
-        mean_s, worst_s, per_state = _score_design_multistate(
-            target, binder, ensemble, []
-        )
-        wt_seq = _extract_interface_sequence(binder, designable_positions)
+        wt_seq = _designed_sequence(wildtype, [])
         return [{
             "sequence": wt_seq,
             "mutations": "wildtype",
             "mean_score": round(mean_s, 3),
             "worst_score": round(worst_s, 3),
-            "robustness": round(worst_s * 0.6 + mean_s * 0.4, 3),
+            "robustness": round(robustness, 3),
             "per_state_scores": per_state,
         }]
 
-    # Greedy beam search: iterate over mutable positions
-    # Each beam entry: (mutations_list, cumulative_score)
-    beam: list[tuple[list[tuple[str, int, str]], float]] = [([], 0.0)]
+    # Greedy beam search: iterate over mutable positions.  Every candidate
+    # shares the wild-type robustness, so the beam keeps the first beam_width
+    # expansions in enumeration order.
+    beam: list[list[tuple[str, int, str]]] = [[]]
 
     for chain_id, resi in mutable[:8]:  # Cap positions for speed
-        new_beam: list[tuple[list[tuple[str, int, str]], float]] = []
+        new_beam: list[list[tuple[str, int, str]]] = []
         # Get current AA
-        current_aa = _extract_interface_sequence(binder, [(chain_id, resi)])
+        current_aa = wt_aa[(chain_id, resi)]
         if not current_aa or current_aa == "X":
             continue
 
@@ -197,37 +187,32 @@ def design_sequences(
         candidates = candidates[:5]  # Limit per-position candidates
         candidates.insert(0, current_aa)  # Always consider wildtype
 
-        for mutations, prev_score in beam:
+        for mutations in beam:
             for candidate_aa in candidates:
                 if candidate_aa == current_aa:
                     new_mutations = mutations[:]
                 else:
                     new_mutations = mutations + [(chain_id, resi, candidate_aa)]
 
-                mean_s, worst_s, _ = _score_design_multistate(
-                    target, binder, ensemble, new_mutations
-                )
-                robustness = worst_s * 0.6 + mean_s * 0.4
-                new_beam.append((new_mutations, robustness))
+                new_beam.append(new_mutations)
 
-        # Keep top beam_width entries
-        new_beam.sort(key=lambda x: x[1], reverse=True)
         beam = new_beam[:beam_width]
 
     # Expand final beam into full results
     results: list[dict] = []
     seen_seqs: set[str] = set()
+    # Mutation sets already expanded; a repeat would yield a sequence already
+    # in seen_seqs (or one the glycosylation filter rejected)
+    seen_mutations: set[tuple[tuple[str, int, str], ...]] = set()
 
-    for mutations, _ in beam:
-        mean_s, worst_s, per_state = _score_design_multistate(
-            target, binder, ensemble, mutations
-        )
+    for mutations in beam:
+        key = tuple(sorted(mutations))
+        if key in seen_mutations:
+            continue
+        seen_mutations.add(key)
 
         # Build full designed sequence
-        designed_binder = copy.deepcopy(binder)
-        for c, r, aa in mutations:
-            designed_binder = _apply_mutation(designed_binder, c, r, aa)
-        seq = _extract_interface_sequence(designed_binder, designable_positions)
+        seq = _designed_sequence(wildtype, mutations)
 
         # Glycosylation filter
         if no_glycosylation and _has_glycosylation_motif(seq):
@@ -238,7 +223,6 @@ def design_sequences(
         seen_seqs.add(seq)
 
         mut_str = ", ".join(f"{c}{r}{aa}" for c, r, aa in mutations) if mutations else "wildtype"
-        robustness = worst_s * 0.6 + mean_s * 0.4
 
         results.append({
             "sequence": seq,
@@ -253,7 +237,7 @@ def design_sequences(
     for _ in range(min(n_candidates, 20)):
         random_mutations: list[tuple[str, int, str]] = []
         for c, r in mutable[:8]:
-            current_aa = _extract_interface_sequence(binder, [(c, r)])
+            current_aa = wt_aa[(c, r)]
             if not current_aa or current_aa == "X":
                 continue
             if rng.random() < 0.4:  # 40% chance to mutate each position
@@ -265,15 +249,12 @@ def design_sequences(
 
         if not random_mutations:
             continue
+        key = tuple(sorted(random_mutations))
+        if key in seen_mutations:
+            continue
+        seen_mutations.add(key)
 
-        mean_s, worst_s, per_state = _score_design_multistate(
-            target, binder, ensemble, random_mutations
-        )
-
-        designed_binder = copy.deepcopy(binder)
-        for c, r, aa in random_mutations:
-            designed_binder = _apply_mutation(designed_binder, c, r, aa)
-        seq = _extract_interface_sequence(designed_binder, designable_positions)
+        seq = _designed_sequence(wildtype, random_mutations)
 
         if no_glycosylation and _has_glycosylation_motif(seq):
             continue
@@ -282,7 +263,6 @@ def design_sequences(
         seen_seqs.add(seq)
 
         mut_str = ", ".join(f"{c}{r}{aa}" for c, r, aa in random_mutations)
-        robustness = worst_s * 0.6 + mean_s * 0.4
 
         results.append({
             "sequence": seq,
@@ -3,12 +3,17 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import enum
+import os
+import shutil
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 
+import anyio.to_thread
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from fastapi.responses import FileResponse, StreamingResponse
+import orjson
 
 from app import config
 from app.models import (
@@ -20,10 +25,57 @@ from app.models import (
     JobStatusResponse,
     RunMode,
 )
-from app.utils import job_dir, new_job_id, read_meta, write_meta
+from app.utils import (
+    access_job_file,
+    job_dir_ensure,
+    new_job_id,
+    read_meta,
+    unwatch_job,
+    watch_job,
+    write_meta,
+)
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
+# Read size when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Read size when serving results.zip (Starlette's FileResponse default is 64 KiB)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Number of jobs returned by the job list
+JOB_LIST_LIMIT = 50
+
+# meta.json value -> enum member, for building job list items without
+# going through Enum.__call__ per field (see _enum_member)
+_STATUS_BY_VALUE = {m.value: m for m in JobStatus}
+_BINDER_TYPE_BY_VALUE = {m.value: m for m in BinderType}
+_MODE_BY_VALUE = {m.value: m for m in RunMode}
+
+
+class _LargeFileResponse(FileResponse):
+    """FileResponse that reads and sends the file in DOWNLOAD_CHUNK_SIZE chunks."""
+
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+
+def _save_upload(upload: UploadFile, dest: Path, label: str) -> int:
+    """Stream an upload to `dest` in large chunks. Returns the byte count.
+
+    The size cap is enforced while copying, since `UploadFile.size` is not
+    always known up front.
+    """
+    written = 0
+    with open(dest, "wb") as dst:
+        while chunk := upload.file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > config.MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    413, f"{label} PDB exceeds {config.MAX_UPLOAD_MB} MB limit"
+                )
+            dst.write(chunk)
+    return written
+
 
 @router.post("", response_model=JobStatusResponse, status_code=201)
 async def create_job(
@@ -42,7 +94,7 @@ async def create_job(
     for upload, label in [(target_pdb, "target"), (binder_pdb, "binder")]:
         if upload.size and upload.size > config.MAX_UPLOAD_BYTES:
             raise HTTPException(
-                400, f"{label} PDB exceeds {config.MAX_UPLOAD_MB} MB limit"
+                413, f"{label} PDB exceeds {config.MAX_UPLOAD_MB} MB limit"
             )
         if not upload.filename or not upload.filename.lower().endswith(".pdb"):
             raise HTTPException(400, f"{label} file must be a .pdb file")
@@ -59,22 +111,34 @@ async def create_job(
 
     # Create job
     jid = new_job_id()
-    jd = job_dir(jid)
+    jd = job_dir_ensure(jid)
 
     # Save uploaded files
     target_path = jd / "target.pdb"
     binder_path = jd / "binder.pdb"
 
-    target_content = await target_pdb.read()
-    binder_content = await binder_pdb.read()
-
-    if len(target_content) < 50:
-        raise HTTPException(400, "Target PDB file appears empty or too small")
-    if len(binder_content) < 50:
-        raise HTTPException(400, "Binder PDB file appears empty or too small")
-
-    target_path.write_bytes(target_content)
-    binder_path.write_bytes(binder_content)
+    # The copies are blocking file I/O, so keep them off the event loop
+    try:
+        target_size = await anyio.to_thread.run_sync(
+            _save_upload, target_pdb, target_path, "target"
+        )
+        binder_size = await anyio.to_thread.run_sync(
+            _save_upload, binder_pdb, binder_path, "binder"
+        )
+
+        if target_size < 50:
+            raise HTTPException(400, "Target PDB file appears empty or too small")
+        if binder_size < 50:
+            raise HTTPException(400, "Binder PDB file appears empty or too small")
+    except BaseException:
+        # Rejected or failed (e.g. ENOSPC) uploads leave no job behind
+        shutil.rmtree(jd, ignore_errors=True)
+        # Drop the date shard too if this job was its only one
+        try:
+            jd.parent.rmdir()
+        except OSError:
+            pass
+        raise
 
     # Write metadata
     meta = {
@@ -92,7 +156,7 @@ async def create_job(
     }
     write_meta(jid, meta)
 
-   # Run in background thread
+    # Queue on the pipeline worker process pool
     from app.worker import run_pipeline_task
     run_pipeline_task(jid)
 
@@ -101,29 +165,72 @@ async def create_job(
     )
 
 
-@router.get("", response_model=list[JobListItem])
-async def list_jobs() -> list[JobListItem]:
-    """List all jobs, newest first."""
-    items: list[JobListItem] = []
-    jobs_root = config.JOBS_DIR
-    if not jobs_root.exists():
+def _enum_member(by_value: dict, enum_cls: type[enum.Enum], value: str) -> enum.Enum:
+    """Map a meta.json value to its enum member.
+
+    Unknown values fall through to the enum constructor, so they still
+    raise ValueError.
+    """
+    member = by_value.get(value)
+    return member if member is not None else enum_cls(value)
+
+
+def _subdir_names(path: Path) -> list[str]:
+    try:
+        with os.scandir(path) as it:
+            return [entry.name for entry in it if entry.is_dir()]
+    except FileNotFoundError:
         return []
 
-    for d in sorted(jobs_root.iterdir(), reverse=True):
-        meta_path = d / "meta.json"
-        if meta_path.exists():
-            with open(meta_path) as f:
-                meta = json.load(f)
-            items.append(JobListItem(
-                job_id=meta["job_id"],
-                status=JobStatus(meta.get("status", "queued")),
-                binder_type=BinderType(meta.get("binder_type", "other")),
-                mode=RunMode(meta.get("mode", "fast")),
-                created_at=meta.get("created_at", ""),
-                progress=meta.get("progress", 0.0),
-            ))
 
-    return items[:50]  # Cap at 50 most recent
+def _job_ids_newest_first() -> Iterator[str]:
+    """Yield job ids newest first, listing one date shard at a time.
+
+    Shards and job ids both start with the creation timestamp, so older
+    shards are only scanned if the newer ones run out.  Jobs from before
+    sharding (directories named by job id directly under JOBS_DIR) are
+    listed with the shard for their date; anything else is ignored.
+    """
+    shards: set[str] = set()
+    flat_jobs: dict[str, list[str]] = {}
+    for name in _subdir_names(config.JOBS_DIR):
+        date = name[:8]
+        if len(date) != 8 or not date.isdigit():
+            continue
+        if name == date:
+            shards.add(date)
+        else:
+            flat_jobs.setdefault(date, []).append(name)
+
+    for date in sorted(shards | flat_jobs.keys(), reverse=True):
+        names = flat_jobs.get(date, [])
+        if date in shards:
+            names += _subdir_names(config.JOBS_DIR / date)
+        yield from sorted(names, reverse=True)
+
+
+@router.get("", response_model=list[JobListItem])
+async def list_jobs() -> list[JobListItem]:
+    """List the most recent jobs, newest first."""
+    items: list[JobListItem] = []
+    for name in _job_ids_newest_first():
+        try:
+            meta = read_meta(name)
+        except FileNotFoundError:
+            continue
+        items.append(JobListItem(
+            job_id=meta["job_id"],
+            status=_enum_member(_STATUS_BY_VALUE, JobStatus, meta.get("status", "queued")),
+            binder_type=_enum_member(
+                _BINDER_TYPE_BY_VALUE, BinderType, meta.get("binder_type", "other")
+            ),
+            mode=_enum_member(_MODE_BY_VALUE, RunMode, meta.get("mode", "fast")),
+            created_at=meta.get("created_at", ""),
+            progress=meta.get("progress", 0.0),
+        ))
+        if len(items) == JOB_LIST_LIMIT:
+            break
+    return items
 
 
 @router.get("/{job_id}", response_model=JobStatusResponse)
@@ -145,49 +252,144 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
 @router.get("/{job_id}/report", response_model=JobReport)
 async def get_job_report(job_id: str) -> JobReport:
     """Get the full report for a completed job."""
-    jd = job_dir(job_id)
-    report_path = jd / "report.json"
-    if not report_path.exists():
+    try:
+        data = access_job_file(job_id, "report.json", Path.read_bytes)
+    except FileNotFoundError:
         raise HTTPException(404, "Report not ready or job not found")
 
-    with open(report_path) as f:
-        return JobReport(**json.load(f))
+    return JobReport(**orjson.loads(data))
 
 
-@router.get("/{job_id}/logs")
-async def stream_logs(job_id: str):
-    """Server-Sent Events stream of job logs."""
-    jd = job_dir(job_id)
-    log_path = jd / "log.txt"
+def _sse_event(payload: dict) -> str:
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
 
-    async def event_generator():
-        last_pos = 0
-        while True:
-            try:
-                meta = read_meta(job_id)
-            except FileNotFoundError:
-                yield f"data: Job not found\n\n"
-                return
 
-            status = meta.get("status", "queued")
+class _LogTailer:
+    """Reads one job's log and status on behalf of all its SSE clients.
+
+    Each batch of new lines is encoded once and put on every subscriber's
+    queue; a ``None`` item ends the stream.  Lines read so far are replayed
+    to clients that subscribe late.
+    """
 
-            if log_path.exists():
-                with open(log_path) as f:
-                    f.seek(last_pos)
-                    new_lines = f.read()
-                    new_pos = f.tell()
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.subscribers: set[asyncio.Queue] = set()
+        self.lines: list[str] = []
+        self.status = "queued"
+        self.progress = 0.0
+        self.task = asyncio.create_task(self._run())
 
-                if new_lines:
-                    last_pos = new_pos
-                    for line in new_lines.strip().split("\n"):
-                        if line:
-                            yield f"data: {json.dumps({'log': line, 'status': status, 'progress': meta.get('progress', 0)})}\n\n"
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        if self.lines:
+            queue.put_nowait(_sse_event(
+                {"logs": self.lines, "status": self.status, "progress": self.progress}
+            ))
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+        if not self.subscribers and not self.task.done():
+            # Drop it from the registry now so new clients start a fresh tailer
+            if _job_tailers.get(self.job_id) is self:
+                del _job_tailers[self.job_id]
+            self.task.cancel()
+
+    def _publish(self, item: str | None) -> None:
+        for queue in self.subscribers:
+            queue.put_nowait(item)
+
+    async def _run(self) -> None:
+        # Woken by the writers in app.utils; the timeout only paces keepalives
+        # (and picks up writers running in other processes)
+        updated = watch_job(self.job_id)
+        log_fd = None  # opened once log.txt exists, then read with pread
+        last_pos = 0
+        pending = bytearray()  # read past the last newline; held until completed
+        try:
+            while True:
+                updated.clear()
+                try:
+                    meta = read_meta(self.job_id)
+                except FileNotFoundError:
+                    self._publish("data: Job not found\n\n")
+                    return
+
+                self.status = meta.get("status", "queued")
+                self.progress = meta.get("progress", 0)
+
+                if log_fd is None:
+                    try:
+                        log_fd = access_job_file(
+                            self.job_id, "log.txt", lambda p: os.open(p, os.O_RDONLY)
+                        )
+                    except FileNotFoundError:
+                        pass
+
+                if log_fd is not None:
+                    size = os.fstat(log_fd).st_size
+                    if size > last_pos:
+                        pending += os.pread(log_fd, size - last_pos, last_pos)
+                        last_pos = size
+                        # One event per wake-up, carrying every new complete line
+                        end = pending.rfind(b"\n") + 1
+                        complete = pending[:end].decode(errors="replace")
+                        lines = [line for line in complete.split("\n") if line]
+                        del pending[:end]
+                        if lines:
+                            self.lines.extend(lines)
+                            self._publish(_sse_event(
+                                {"logs": lines, "status": self.status, "progress": self.progress}
+                            ))
+
+                if self.status in ("done", "failed"):
+                    self._publish(_sse_event({
+                        "logs": [f"Job {self.status}"],
+                        "status": self.status,
+                        "progress": meta.get("progress", 1.0),
+                    }))
+                    return
+
+                try:
+                    await asyncio.wait_for(updated.wait(), timeout=config.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    self._publish(": keepalive\n\n")
+        finally:
+            unwatch_job(self.job_id, updated)
+            if log_fd is not None:
+                os.close(log_fd)
+            # Runs without yielding after the last publish, so no client can
+            # subscribe to a finished tailer
+            self._publish(None)
+            if _job_tailers.get(self.job_id) is self:
+                del _job_tailers[self.job_id]
+
+
+# Active log tailers by job id, shared by all SSE clients of a job
+_job_tailers: dict[str, _LogTailer] = {}
 
-            if status in ("done", "failed"):
-                yield f"data: {json.dumps({'log': f'Job {status}', 'status': status, 'progress': meta.get('progress', 1.0)})}\n\n"
-                return
 
-            await asyncio.sleep(1.0)
+@router.get("/{job_id}/logs")
+async def stream_logs(job_id: str):
+    """Server-Sent Events stream of job logs.
+
+    Each event is a JSON object ``{"logs": [...], "status": ..., "progress": ...}``
+    holding the lines appended since the previous event.  All clients of a
+    job share a single reader (see _LogTailer).
+    """
+
+    async def event_generator():
+        tailer = _job_tailers.get(job_id)
+        if tailer is None:
+            tailer = _job_tailers[job_id] = _LogTailer(job_id)
+        queue = tailer.subscribe()
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            tailer.unsubscribe(queue)
 
     return StreamingResponse(
         event_generator(),
@@ -203,13 +405,15 @@ async def stream_logs(job_id: str):
 @router.get("/{job_id}/download")
 async def download_results(job_id: str):
     """Download the results ZIP for a completed job."""
-    jd = job_dir(job_id)
-    zip_path = jd / "results.zip"
-    if not zip_path.exists():
+    try:
+        zip_path, st = access_job_file(job_id, "results.zip", lambda p: (p, os.stat(p)))
+    except FileNotFoundError:
         raise HTTPException(404, "Results ZIP not ready")
 
-    return FileResponse(
+    # Passing the stat result saves FileResponse from taking its own
+    return _LargeFileResponse(
         path=str(zip_path),
+        stat_result=st,
         media_type="application/zip",
         filename=f"flexbind-{job_id}.zip",
     )
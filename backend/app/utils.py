@@ -2,44 +2,222 @@
 
 from __future__ import annotations
 
-import json
-import uuid
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional, TypeVar
+
+import orjson
 
 from app.config import JOBS_DIR
 from app.models import JobStatus
 
+T = TypeVar("T")
+
+# meta.json stays indented for humans; numpy scalars may come from the pipeline
+_META_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+# Parsed meta.json per job, with the (inode, mtime, size) it was read at;
+# least recently read jobs are evicted beyond META_CACHE_SIZE entries
+META_CACHE_SIZE = 256
+_meta_cache: OrderedDict[str, tuple[tuple[int, int, int], dict[str, Any]]] = OrderedDict()
+_meta_cache_lock = threading.Lock()
+
+# fdatasync skips the metadata flush where available (not on macOS)
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+# SSE streams waiting for updates, per job: (event loop, event) pairs.  Updates
+# arrive off the event loop (relayed from pipeline worker processes, or from
+# the pool's callback thread), so events are set via call_soon_threadsafe.
+_job_watchers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+_job_watchers_lock = threading.Lock()
+
+# set_progress skips writes smaller than this unless the message changes
+PROGRESS_EPSILON = 0.01
+PROGRESS_MILESTONES = frozenset({0.25, 0.5, 0.75, 1.0})
+
+# Last (progress, message) written by set_progress, per job
+_last_progress: dict[str, tuple[float, str]] = {}
+
+# Jobs found by find_flat_job in the flat layout that predates date sharding.
+# New jobs are never created there, so this only grows to the legacy count.
+_flat_job_ids: set[str] = set()
+
+# log.txt descriptors (O_APPEND) per job, kept open until the job finishes
+_log_fds: dict[str, int] = {}
+_log_fds_lock = threading.Lock()
+
+# In pipeline worker processes: passes job ids to the API process to notify
+_update_forwarder: Optional[Callable[[str], None]] = None
+
 
 def new_job_id() -> str:
     """Generate a compact job identifier."""
-    return datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    return time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + "-" + os.urandom(4).hex()
 
 
 def job_dir(job_id: str) -> Path:
-    """Return (and ensure existence of) the job working directory."""
-    d = JOBS_DIR / job_id
+    """Return the job working directory (which may not exist).
+
+    Jobs are sharded by creation date (the id's first 8 characters), which
+    keeps directory sizes bounded and lets the job list stop early.  Jobs
+    created before sharding live directly under JOBS_DIR; once
+    `find_flat_job` has found one, its flat directory is returned.
+    """
+    if job_id in _flat_job_ids:
+        return JOBS_DIR / job_id
+    return JOBS_DIR / job_id[:8] / job_id
+
+
+def find_flat_job(job_id: str) -> bool:
+    """Look for a job in the flat pre-sharding layout (JOBS_DIR/<job_id>).
+
+    Called only after a file was not found under `job_dir`, so sharded jobs
+    never pay for the check.  Returns True if the job was newly found, after
+    which `job_dir` points at it.
+    """
+    if len(job_id) <= 8 or job_id in _flat_job_ids:
+        return False
+    if not (JOBS_DIR / job_id).is_dir():
+        return False
+    _flat_job_ids.add(job_id)
+    return True
+
+
+def access_job_file(job_id: str, name: str, access: Callable[[Path], T]) -> T:
+    """Return `access(path)` for a file in the job directory.
+
+    If the file is missing, the job is looked for in the flat layout (see
+    `find_flat_job`) and the access retried there; FileNotFoundError
+    propagates otherwise.
+    """
+    try:
+        return access(job_dir(job_id) / name)
+    except FileNotFoundError:
+        if not find_flat_job(job_id):
+            raise
+    return access(job_dir(job_id) / name)
+
+
+def job_dir_ensure(job_id: str) -> Path:
+    """Return the job working directory, creating it if needed."""
+    d = job_dir(job_id)
     d.mkdir(parents=True, exist_ok=True)
     return d
 
 
+def watch_job(job_id: str) -> asyncio.Event:
+    """Register an event that is set whenever the job's meta or log changes.
+
+    Must be called from a running event loop; pair with `unwatch_job`.
+    """
+    event = asyncio.Event()
+    with _job_watchers_lock:
+        _job_watchers.setdefault(job_id, set()).add((asyncio.get_running_loop(), event))
+    return event
+
+
+def unwatch_job(job_id: str, event: asyncio.Event) -> None:
+    """Remove an event registered with `watch_job`."""
+    with _job_watchers_lock:
+        watchers = _job_watchers.get(job_id, set())
+        watchers -= {w for w in watchers if w[1] is event}
+        if not watchers:
+            _job_watchers.pop(job_id, None)
+
+
+def forward_job_updates(forward: Callable[[str], None]) -> None:
+    """Also hand every job update in this process to `forward`.
+
+    Used by pipeline worker processes, whose writes would otherwise not
+    reach the log streams held by the API process.
+    """
+    global _update_forwarder
+    _update_forwarder = forward
+
+
+def notify_job_update(job_id: str) -> None:
+    """Wake every log stream watching `job_id`."""
+    if _update_forwarder is not None:
+        _update_forwarder(job_id)
+    with _job_watchers_lock:
+        watchers = list(_job_watchers.get(job_id, ()))
+    for loop, event in watchers:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+
 def read_meta(job_id: str) -> dict[str, Any]:
-    """Read the job metadata JSON from disk."""
-    meta_path = job_dir(job_id) / "meta.json"
-    if not meta_path.exists():
-        raise FileNotFoundError(f"Job {job_id} not found")
-    with open(meta_path) as f:
-        return json.load(f)
+    """Read the job metadata JSON from disk.
+
+    The parsed document is cached until meta.json changes, so repeated reads
+    (status polls, SSE streams) cost a single stat.
+    """
+    try:
+        meta_path, st = access_job_file(job_id, "meta.json", lambda p: (p, os.stat(p)))
+    except FileNotFoundError:
+        with _meta_cache_lock:
+            _meta_cache.pop(job_id, None)
+        raise FileNotFoundError(f"Job {job_id} not found") from None
+
+    # meta.json is replaced on every write, so a new inode, mtime or size
+    # means new content (mtime alone is too coarse for back-to-back writes)
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _meta_cache_lock:
+        cached = _meta_cache.get(job_id)
+        if cached is not None and cached[0] == signature:
+            _meta_cache.move_to_end(job_id)
+            return dict(cached[1])
+
+    data = orjson.loads(meta_path.read_bytes())
+    with _meta_cache_lock:
+        _meta_cache[job_id] = (signature, data)
+        _meta_cache.move_to_end(job_id)
+        while len(_meta_cache) > META_CACHE_SIZE:
+            _meta_cache.popitem(last=False)
+    return dict(data)
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Durably replace `path` with `data`.
+
+    The bytes go to a sibling temp file that is flushed to disk before being
+    renamed over `path`, so a crash leaves either the old or the new content.
+    """
+    tmp = path.with_suffix(".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        _fdatasync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
 
 
 def write_meta(job_id: str, data: dict[str, Any]) -> None:
-    """Atomically write job metadata to disk."""
+    """Atomically write job metadata to disk.
+
+    The document is serialised up front and written with a single call.
+    """
     meta_path = job_dir(job_id) / "meta.json"
-    tmp = meta_path.with_suffix(".tmp")
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2, default=str)
-    tmp.replace(meta_path)
+    payload = orjson.dumps(data, default=str, option=_META_JSON_OPTIONS)
+    try:
+        _atomic_write_bytes(meta_path, payload)
+    except FileNotFoundError:
+        # First write for a job whose directory was not created up front
+        job_dir_ensure(job_id)
+        _atomic_write_bytes(meta_path, payload)
+    with _meta_cache_lock:
+        _meta_cache.pop(job_id, None)
+    notify_job_update(job_id)
 
 
 def update_meta(job_id: str, **kwargs: Any) -> dict[str, Any]:
@@ -50,22 +228,63 @@ def update_meta(job_id: str, **kwargs: Any) -> dict[str, Any]:
     return meta
 
 
+def _log_fd(job_id: str) -> int:
+    with _log_fds_lock:
+        fd = _log_fds.get(job_id)
+        if fd is None:
+            log_path = job_dir(job_id) / "log.txt"
+            fd = _log_fds[job_id] = os.open(
+                log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+        return fd
+
+
+def _close_log(job_id: str) -> None:
+    with _log_fds_lock:
+        fd = _log_fds.pop(job_id, None)
+    if fd is not None:
+        os.close(fd)
+
+
 def append_log(job_id: str, message: str) -> None:
-    """Append a timestamped line to the job log file."""
-    log_path = job_dir(job_id) / "log.txt"
+    """Append a timestamped line to the job log file.
+
+    Each line is a single write to a descriptor kept open for the job's
+    lifetime; `set_status` closes it once the job is done or failed.
+    """
     ts = datetime.now(timezone.utc).strftime("%H:%M:%S")
-    with open(log_path, "a") as f:
-        f.write(f"[{ts}] {message}\n")
+    os.write(_log_fd(job_id), f"[{ts}] {message}\n".encode())
+    notify_job_update(job_id)
 
 
 def set_progress(job_id: str, progress: float, message: str = "") -> None:
-    """Update progress (0.0–1.0) in metadata and log the message."""
-    update_meta(job_id, progress=round(progress, 3), message=message)
+    """Update progress (0.0–1.0) in metadata and log the message.
+
+    Updates that repeat the last message are dropped if progress is unchanged,
+    or moved by less than PROGRESS_EPSILON without reaching one of the
+    PROGRESS_MILESTONES.
+    """
+    progress = round(progress, 3)
+    last = _last_progress.get(job_id)
+    if last is not None and last[1] == message and (
+        progress == last[0]
+        or (abs(progress - last[0]) < PROGRESS_EPSILON and progress not in PROGRESS_MILESTONES)
+    ):
+        return
+    _last_progress[job_id] = (progress, message)
+    update_meta(job_id, progress=progress, message=message)
     if message:
         append_log(job_id, message)
 
 
 def set_status(job_id: str, status: JobStatus, message: str = "") -> None:
-    """Update job status in metadata."""
-    update_meta(job_id, status=status.value, message=message)
+    """Update job status in metadata.
+
+    The log line is written first, so a log stream that sees the new status
+    has already been able to read it.
+    """
     append_log(job_id, f"STATUS → {status.value}" + (f": {message}" if message else ""))
+    update_meta(job_id, status=status.value, message=message)
+    _last_progress.pop(job_id, None)
+    if status in (JobStatus.DONE, JobStatus.FAILED):
+        _close_log(job_id)
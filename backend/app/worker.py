@@ -1,16 +1,119 @@
-"""Background task runner using threads (no Celery/Redis needed)."""
+"""Background task runner using a process pool (no Celery/Redis needed).
 
+Pipelines are CPU-bound, so they run in separate processes instead of
+competing with the API's event loop for the GIL.
+"""
+
+import multiprocessing
 import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from app import config
+
+# spawn, not fork: workers must not inherit the server's sockets and event loop
+_mp_context = multiprocessing.get_context("spawn")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Carries job update notifications from pipeline workers to this process;
+# created with the first pool and shared by any replacement pools
+_updates = None
+
+# Submitted pipelines by job id, kept until they finish (e.g. for cancellation)
+_futures: dict[str, Future] = {}
+
+
+def _init_worker(updates) -> None:
+    """Pool initializer: send job update notifications back to the API process."""
+    from app.utils import forward_job_updates
+
+    forward_job_updates(updates.put)
+
+
+def _relay_updates(updates) -> None:
+    """Wake log streams in this process for updates made by pipeline workers."""
+    from app.utils import notify_job_update
+
+    while True:
+        notify_job_update(updates.get())
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _updates
+    with _executor_lock:
+        if _updates is None:
+            _updates = _mp_context.Queue()
+            threading.Thread(target=_relay_updates, args=(_updates,), daemon=True).start()
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=config.WORKER_PROCESSES,
+                mp_context=_mp_context,
+                initializer=_init_worker,
+                initargs=(_updates,),
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next submission starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _mark_failed(job_id: str, message: str) -> None:
+    """Fail a job whose pipeline ended without recording a final status."""
+    from app.models import JobStatus
+    from app.utils import read_meta, set_status
+
+    try:
+        status = read_meta(job_id).get("status")
+    except FileNotFoundError:
+        return
+    if status not in (JobStatus.DONE.value, JobStatus.FAILED.value):
+        set_status(job_id, JobStatus.FAILED, message)
+
+
+def _submit(job_id: str, fn: Callable[[str], None]) -> Future:
+    """Run `fn(job_id)` on the pool, failing the job if it cannot finish.
+
+    A worker killed mid-job (e.g. by the OOM killer) breaks the whole pool;
+    the pool is then replaced, and the affected jobs are marked failed since
+    they never got to record it themselves.
+    """
+    executor = _get_executor()
+    try:
+        future = executor.submit(fn, job_id)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        executor = _get_executor()
+        future = executor.submit(fn, job_id)
+
+    def _done(future: Future) -> None:
+        _futures.pop(job_id, None)
+        if future.cancelled():
+            _mark_failed(job_id, "Pipeline cancelled")
+            return
+        exc = future.exception()
+        if exc is None:
+            return
+        if isinstance(exc, BrokenProcessPool):
+            _discard_executor(executor)
+        print(f"Pipeline error for {job_id}: {exc}")
+        _mark_failed(job_id, str(exc) or type(exc).__name__)
+
+    _futures[job_id] = future
+    future.add_done_callback(_done)
+    return future
+
 
 def run_pipeline_task(job_id: str) -> None:
-    """Run the pipeline in a background thread."""
+    """Queue the pipeline for a job on the worker process pool."""
     from app.pipeline.runner import run_pipeline
 
-    def _run():
-        try:
-            run_pipeline(job_id)
-        except Exception as e:
-            print(f"Pipeline error for {job_id}: {e}")
-
-    t = threading.Thread(target=_run, daemon=True)
-    t.start()
+    _submit(job_id, run_pipeline)
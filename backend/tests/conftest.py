@@ -9,6 +9,8 @@ import pytest
 from Bio.PDB import PDBParser
 from Bio.PDB.Structure import Structure
 
+from app import config, utils
+
 
 # Minimal PDB content: a 5-residue alpha-helix (chain A) as "target"
 MINI_TARGET_PDB = textwrap.dedent("""\
@@ -75,6 +77,15 @@ def tmp_dir(tmp_path: Path) -> Path:
     return tmp_path
 
 
+@pytest.fixture
+def jobs_dir(tmp_dir: Path, monkeypatch) -> Path:
+    """Point the job store at a temporary directory."""
+    monkeypatch.setattr(config, "JOBS_DIR", tmp_dir)
+    monkeypatch.setattr(utils, "JOBS_DIR", tmp_dir)
+    monkeypatch.setattr(utils, "_flat_job_ids", set())
+    return tmp_dir
+
+
 @pytest.fixture
 def target_pdb_path(tmp_dir: Path) -> Path:
     p = tmp_dir / "target.pdb"
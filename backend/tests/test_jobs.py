@@ -0,0 +1,130 @@
+"""Tests for the job API endpoints."""
+
+import asyncio
+import errno
+import io
+
+import orjson
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app import config, utils
+from app.routes import jobs
+
+
+def test_list_jobs_newest_first(jobs_dir, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LIST_LIMIT", 3)
+    for jid in ("20231231-235959-abcd", "20240101-000000-abcd", "20240101-000001-abcd"):
+        utils.write_meta(jid, {"job_id": jid, "status": "queued"})
+    # Directories without meta.json are skipped, not counted
+    utils.job_dir_ensure("20240101-000009-junk")
+
+    # The newest shard runs out, so the list continues into the previous day
+    items = asyncio.run(jobs.list_jobs())
+    assert [i.job_id for i in items] == [
+        "20240101-000001-abcd", "20240101-000000-abcd", "20231231-235959-abcd",
+    ]
+
+
+def test_list_jobs_rejects_unknown_status(jobs_dir):
+    utils.write_meta("20240101-000000-abcd", {"job_id": "20240101-000000-abcd", "status": "?"})
+    with pytest.raises(ValueError):
+        asyncio.run(jobs.list_jobs())
+
+
+def test_list_jobs_includes_flat_layout_jobs(jobs_dir):
+    utils.write_meta("20240102-000000-abcd", {"job_id": "20240102-000000-abcd"})
+    # Jobs created before sharding sit directly under JOBS_DIR
+    for jid in ("20240102-120000-abcd", "20240101-000000-abcd"):
+        (jobs_dir / jid / "ensemble").mkdir(parents=True)
+        (jobs_dir / jid / "meta.json").write_bytes(orjson.dumps({"job_id": jid}))
+    (jobs_dir / "lost+found").mkdir()
+
+    items = asyncio.run(jobs.list_jobs())
+    assert [i.job_id for i in items] == [
+        "20240102-120000-abcd", "20240102-000000-abcd", "20240101-000000-abcd",
+    ]
+    assert utils.job_dir("20240101-000000-abcd") == jobs_dir / "20240101-000000-abcd"
+
+
+def test_list_jobs_missing_root(jobs_dir, monkeypatch):
+    monkeypatch.setattr(config, "JOBS_DIR", jobs_dir / "missing")
+    assert asyncio.run(jobs.list_jobs()) == []
+
+
+def _logged(events):
+    lines = []
+    for event in events:
+        if event.startswith("data: "):
+            lines += [line.split("] ", 1)[-1] for line in orjson.loads(event[6:])["logs"]]
+    return lines
+
+
+def test_stream_logs_clients_share_one_tailer(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "status": "running", "progress": 0.5})
+    utils.append_log("job", "first")
+
+    async def scenario():
+        a = (await jobs.stream_logs("job")).body_iterator
+        events_a = [await a.__anext__()]
+        # A late client gets the lines read so far from the running tailer
+        b = (await jobs.stream_logs("job")).body_iterator
+        events_b = [await b.__anext__()]
+        assert len(jobs._job_tailers) == 1
+
+        utils.append_log("job", "second")
+        utils.set_status("job", utils.JobStatus.DONE)
+        events_a += [e async for e in a]
+        events_b += [e async for e in b]
+        return events_a, events_b
+
+    events_a, events_b = asyncio.run(scenario())
+    expected = ["first", "second", "STATUS → done", "Job done"]
+    assert _logged(events_a) == expected
+    assert _logged(events_b) == expected
+    assert not jobs._job_tailers
+
+
+def test_stream_logs_holds_partial_lines(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "status": "running"})
+    log_path = utils.job_dir("job") / "log.txt"
+    log_path.write_bytes(b"[t] first\n[t] sec")
+
+    async def scenario():
+        stream = (await jobs.stream_logs("job")).body_iterator
+        events = [await stream.__anext__()]
+        with open(log_path, "ab") as f:
+            f.write(b"ond\n")
+        utils.update_meta("job", status="done")
+        return events + [e async for e in stream]
+
+    events = asyncio.run(scenario())
+    assert _logged(events[:1]) == ["first"]
+    assert _logged(events) == ["first", "second", "Job done"]
+
+
+def test_create_job_cleans_up_failed_upload(jobs_dir, monkeypatch):
+    def disk_full(upload, dest, label):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(jobs, "_save_upload", disk_full)
+    uploads = [UploadFile(io.BytesIO(b"ATOM"), filename=f"{n}.pdb") for n in ("t", "b")]
+    with pytest.raises(OSError):
+        asyncio.run(jobs.create_job(
+            *uploads, binder_type="other", flexible_residues="", interface_distance=8.0,
+            mode="fast", seed=42, no_glycosylation=True,
+        ))
+    assert list(jobs_dir.iterdir()) == []
+
+
+def test_create_job_rejects_oversized_upload_up_front(jobs_dir, monkeypatch):
+    monkeypatch.setattr(config, "MAX_UPLOAD_BYTES", 10)
+    target = UploadFile(io.BytesIO(b"ATOM"), size=11, filename="t.pdb")
+    binder = UploadFile(io.BytesIO(b"ATOM"), filename="b.pdb")
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(jobs.create_job(
+            target, binder, binder_type="other", flexible_residues="", interface_distance=8.0,
+            mode="fast", seed=42, no_glycosylation=True,
+        ))
+    assert excinfo.value.status_code == 413
+    assert list(jobs_dir.iterdir()) == []
@@ -1,6 +1,7 @@
 """Tests for the preprocessing module."""
 
 from app.pipeline.preprocess import (
+    SEQUENCE_CACHE_KEY,
     clean_pdb,
     detect_interface_residues,
     extract_sequence,
@@ -46,3 +47,11 @@ def test_extract_sequence(target_structure):
     seqs = extract_sequence(target_structure)
     assert "A" in seqs
     assert seqs["A"] == "AGLSV"
+
+
+def test_extract_sequence_is_cached(target_structure):
+    first = extract_sequence(target_structure)
+    assert SEQUENCE_CACHE_KEY in target_structure.xtra
+    first["A"] = "mutated by caller"
+    # Later calls come from the cache and are unaffected by caller edits
+    assert extract_sequence(target_structure) == {"A": "AGLSV"}
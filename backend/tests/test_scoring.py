@@ -1,6 +1,13 @@
 """Tests for scoring and developability modules."""
 
-from app.pipeline.scoring import score_interface, score_ensemble
+import numpy as np
+
+from app.pipeline.scoring import (
+    StateArrays,
+    precompute_state_arrays,
+    score_ensemble,
+    score_interface,
+)
 from app.pipeline.developability import (
     _compute_pI,
     _hydrophobic_patch_score,
@@ -23,6 +30,40 @@ def test_score_interface_deterministic(target_structure, binder_structure):
     assert s1.composite == s2.composite
 
 
+def test_score_interface_accepts_precomputed_arrays(target_structure, binder_structure):
+    from_structures = score_interface(target_structure, binder_structure)
+    from_arrays = score_interface(
+        precompute_state_arrays(target_structure),
+        precompute_state_arrays(binder_structure),
+    )
+    assert from_arrays == from_structures
+
+
+def _single_atom_state(cb, atom, atom_is_n):
+    idx = np.array([0])
+    empty = np.array([], dtype=int)
+    return StateArrays(
+        cb_xyz=np.array([cb], dtype=np.float32),
+        all_xyz=np.array([atom], dtype=np.float32),
+        n_idx=idx if atom_is_n else empty,
+        o_idx=empty if atom_is_n else idx,
+    )
+
+
+def test_score_interface_cutoffs_are_strict():
+    target = _single_atom_state((0, 0, 0), (0, 0, 0), atom_is_n=True)
+    # Cβ pair exactly at the 8 Å contact cutoff, N…O exactly at 3.5 Å
+    on_cutoff = _single_atom_state((8, 0, 0), (3.5, 0, 0), atom_is_n=False)
+    score = score_interface(target, on_cutoff)
+    assert score.contact_score == 0
+    assert score.hbond_proxy == 0
+
+    inside = _single_atom_state((7.5, 0, 0), (3.0, 0, 0), atom_is_n=False)
+    score = score_interface(target, inside)
+    assert score.contact_score > 0
+    assert score.hbond_proxy > 0
+
+
 def test_score_ensemble_returns_per_state(target_structure, binder_structure):
     flex = [("B", 1), ("B", 2), ("B", 3)]
     ensemble = generate_ensemble(
@@ -42,6 +83,13 @@ def test_hydrophobic_patch_score():
     assert _hydrophobic_patch_score("DENKR") == 0.0
 
 
+def test_hydrophobic_patch_score_detects_local_patch():
+    # Same hydrophobic residues, but only the first sequence clusters them
+    clustered = "DENKR" * 3 + "IVLIVLI" + "DENKR" * 3
+    dispersed = "DIENVKLRDIENVKLRDIENKR"
+    assert _hydrophobic_patch_score(clustered) > _hydrophobic_patch_score(dispersed)
+
+
 def test_net_charge():
     # Pure lysines should be positive at pH 7.4
     charge = _net_charge_at_ph("KKKK", 7.4)
@@ -0,0 +1,36 @@
+"""Tests for the sequence design module."""
+
+from app.pipeline.ensemble import generate_ensemble
+from app.pipeline.sequence_design import (
+    _extract_interface_sequence,
+    _has_glycosylation_motif,
+    design_sequences,
+)
+
+
+def test_has_glycosylation_motif():
+    assert _has_glycosylation_motif("AANGSAA")
+    assert _has_glycosylation_motif("NAT")
+    assert not _has_glycosylation_motif("AANPSAA")
+    assert not _has_glycosylation_motif("NS")
+
+
+def test_extract_interface_sequence(binder_structure):
+    assert _extract_interface_sequence(binder_structure, [("B", 1), ("B", 3)]) == "KF"
+
+
+def test_design_sequences_ranked(target_structure, binder_structure):
+    flex = [("B", 1), ("B", 2), ("B", 3)]
+    ensemble = generate_ensemble(
+        binder_structure, target_structure, flex,
+        n_samples=4, n_clusters=2, seed=42,
+    )
+    designs = design_sequences(
+        target_structure, binder_structure, ensemble, flex,
+        n_candidates=5, beam_width=2, seed=42,
+    )
+    assert 0 < len(designs) <= 5
+    assert all(len(d["sequence"]) == len(flex) for d in designs)
+    assert len({d["sequence"] for d in designs}) == len(designs)
+    robustness = [d["robustness"] for d in designs]
+    assert robustness == sorted(robustness, reverse=True)
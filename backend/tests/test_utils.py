@@ -0,0 +1,100 @@
+"""Tests for job metadata and log helpers."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from app import utils
+
+
+def test_read_meta_missing_job(jobs_dir):
+    with pytest.raises(FileNotFoundError):
+        utils.read_meta("nope")
+    assert not utils.job_dir("nope").exists()
+
+
+def test_read_meta_sees_every_write(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "progress": 0.0})
+    assert utils.read_meta("job")["progress"] == 0.0
+
+    # Back-to-back writes of the same size must not be served from cache
+    for p in (0.1, 0.2, 0.3):
+        utils.update_meta("job", progress=p)
+        assert utils.read_meta("job")["progress"] == p
+
+
+def test_read_meta_stats_each_job_once(jobs_dir, monkeypatch):
+    sharded, flat = "20240102-000000-abcd", "20240101-000000-abcd"
+    utils.write_meta(sharded, {"job_id": sharded})
+    # Jobs created before sharding sit directly under JOBS_DIR
+    (jobs_dir / flat).mkdir()
+    (jobs_dir / flat / "meta.json").write_text(f'{{"job_id": "{flat}"}}')
+    assert utils.read_meta(flat)["job_id"] == flat
+
+    stats = []
+    real_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        stats.append(Path(path))
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+    assert utils.read_meta(sharded)["job_id"] == sharded
+    assert utils.read_meta(flat)["job_id"] == flat
+    # No probing of the sharded path for a flat job once it has been found
+    assert stats == [
+        jobs_dir / sharded[:8] / sharded / "meta.json",
+        jobs_dir / flat / "meta.json",
+    ]
+
+
+def test_read_meta_returns_copy(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "status": "queued"})
+    utils.read_meta("job")["status"] = "mutated"
+    assert utils.read_meta("job")["status"] == "queued"
+
+
+def test_log_closed_when_job_finishes(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "status": "running"})
+    utils.append_log("job", "first")
+    utils.set_status("job", utils.JobStatus.DONE, "finished")
+    assert "job" not in utils._log_fds
+
+    lines = (utils.job_dir("job") / "log.txt").read_text().splitlines()
+    assert [line.split("] ", 1)[1] for line in lines] == [
+        "first", "STATUS → done: finished",
+    ]
+
+
+def test_set_progress_skips_tiny_repeats(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "progress": 0.0})
+    utils.set_progress("job", 0.100, "Scoring")
+    utils.set_progress("job", 0.105, "Scoring")
+    assert utils.read_meta("job")["progress"] == 0.1
+
+    # A new message or a milestone is always written
+    utils.set_progress("job", 0.106, "Scoring done")
+    assert utils.read_meta("job")["progress"] == 0.106
+    utils.set_progress("job", 0.25, "Scoring done")
+    utils.set_progress("job", 0.25, "Scoring done")
+    assert utils.read_meta("job")["progress"] == 0.25
+
+    log = (utils.job_dir("job") / "log.txt").read_text().splitlines()
+    assert len(log) == 3
+
+
+def test_meta_cache_is_bounded(jobs_dir, monkeypatch):
+    monkeypatch.setattr(utils, "META_CACHE_SIZE", 2)
+    monkeypatch.setattr(utils, "_meta_cache", utils.OrderedDict())
+    for jid in ("a", "b", "c"):
+        utils.write_meta(jid, {"job_id": jid})
+        utils.read_meta(jid)
+    utils.read_meta("b")
+    assert list(utils._meta_cache) == ["c", "b"]
+
+    # A job that disappears is dropped on the 404
+    (utils.job_dir("c") / "meta.json").unlink()
+    with pytest.raises(FileNotFoundError):
+        utils.read_meta("c")
+    assert list(utils._meta_cache) == ["b"]
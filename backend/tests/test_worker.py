@@ -0,0 +1,32 @@
+"""Tests for the background pipeline runner."""
+
+import os
+import time
+
+from app import utils, worker
+
+
+def _crash(job_id: str) -> None:
+    os._exit(1)  # a worker killed mid-job, as by the OOM killer
+
+
+def _noop(job_id: str) -> None:
+    pass
+
+
+def _wait_for_status(job_id: str, status: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while utils.read_meta(job_id)["status"] != status:
+        assert time.monotonic() < deadline, f"job never reached {status}"
+        time.sleep(0.05)
+
+
+def test_crashed_worker_fails_job_and_pool_recovers(jobs_dir):
+    utils.write_meta("job", {"job_id": "job", "status": "running"})
+    broken = worker._get_executor()
+    worker._submit("job", _crash)
+    _wait_for_status("job", "failed")
+    assert worker._executor is not broken
+
+    # Later jobs run on a fresh pool
+    assert worker._submit("other", _noop).result(timeout=30) is None
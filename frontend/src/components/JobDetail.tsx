@@ -24,8 +24,8 @@ export default function JobDetail({ jobId, onBack }: Props) {
     evtSource.onmessage = (e) => {
       try {
         const data = JSON.parse(e.data);
-        if (data.log) {
-          setLogs((prev) => [...prev.slice(-200), data.log]);
+        if (data.logs?.length) {
+          setLogs((prev) => [...prev, ...data.logs].slice(-201));
         }
         if (data.status) setStatus(data.status);
         if (data.progress !== undefined) setProgress(data.progress);